@@ -0,0 +1,131 @@
+import threading
+from collections import OrderedDict
+from copy import copy
+from time import monotonic
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.models import User
+from .cache import get_cache
+
+VERSION_CLAIM = 'version'
+# Текущая версия прав доступа пользователя в общем для процессов кэше.
+USER_VERSION_KEY = 'api:user-version:{user_id}'
+
+
+class UserCache:
+    """
+    Ограниченный LRU-кэш пользователей с временем жизни записей.
+    Общий для всех потоков процесса.
+    """
+    def __init__(self, max_size, timeout):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                return None
+            user, expires = entry
+            if expires < monotonic():
+                del self._users[user_id]
+                return None
+            self._users.move_to_end(user_id)
+        return copy(user)
+
+    def set(self, user):
+        with self._lock:
+            self._users[user.pk] = (copy(user), monotonic() + self.timeout)
+            self._users.move_to_end(user.pk)
+            while len(self._users) > self.max_size:
+                self._users.popitem(last=False)
+
+    def delete(self, user_id):
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+
+user_cache = UserCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TIMEOUT)
+
+
+def get_user_version(user_id):
+    return get_cache().get(USER_VERSION_KEY.format(user_id=user_id))
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    user_cache.delete(instance.pk)
+    get_cache().set(
+        USER_VERSION_KEY.format(user_id=instance.pk), instance.version, None
+    )
+
+
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    user_cache.delete(instance.pk)
+    get_cache().delete(USER_VERSION_KEY.format(user_id=instance.pk))
+
+
+class VersionedAccessToken(AccessToken):
+    """Токен доступа с версией прав доступа пользователя."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[VERSION_CLAIM] = user.version
+        return token
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    Аутентификация по JWT без запроса к базе на каждый запрос.
+    Пользователь берётся из кэша процесса, если версия его прав доступа
+    совпадает с версией в общем кэше API и не старее указанной в токене,
+    иначе загружается из базы заново. Смена прав в другом процессе
+    видна сразу, только если API_CACHE_ALIAS общий для процессов;
+    с кэшем в памяти процесса — не позже USER_CACHE_TIMEOUT.
+    """
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                'Token contained no recognizable user identification'
+            )
+        version = validated_token.get(VERSION_CLAIM)
+        user = user_cache.get(user_id)
+        if (user is None
+                or user.version != get_user_version(user.pk)
+                or (version is not None and user.version < version)):
+            try:
+                user = User.objects.get(
+                    **{api_settings.USER_ID_FIELD: user_id}
+                )
+            except User.DoesNotExist:
+                raise AuthenticationFailed(
+                    'User not found', code='user_not_found'
+                )
+            user_cache.set(user)
+            # add, а не set: прочитанная версия могла уже устареть.
+            get_cache().add(
+                USER_VERSION_KEY.format(user_id=user.pk), user.version, None
+            )
+        if not user.is_active:
+            raise AuthenticationFailed(
+                'User is inactive', code='user_inactive'
+            )
+        return user
@@ -0,0 +1,136 @@
+"""Подсказки по началу названий произведений, жанров и категорий."""
+
+import threading
+from bisect import bisect_left, insort
+from heapq import merge
+from itertools import islice
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from reviews.models import Category, Genre, Title
+from .cache import SharedIndexMixin, VersionCounter
+from .filters import MAX_CHAR
+
+# Тип подсказки: модель и поле, которым подсказка ссылается на объект.
+SOURCES = {
+    'title': (Title, 'id'),
+    'genre': (Genre, 'slug'),
+    'category': (Category, 'slug'),
+}
+
+
+def normalize(name):
+    return name.casefold()
+
+
+class PrefixIndex(SharedIndexMixin):
+    """
+    Отсортированные массивы названий по типам с поиском префикса
+    двоичным поиском. Строится из базы при первом обращении и
+    обновляется сигналами сохранения и удаления моделей. Изменения
+    в других процессах видны по общему счётчику версий.
+    """
+    counter = VersionCounter('prefix-index')
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built = False
+        self._entries = {kind: [] for kind in SOURCES}
+        self._keys = {}
+
+    def build(self):
+        entries = {kind: [] for kind in SOURCES}
+        keys = {}
+        for kind, (model, ref_field) in SOURCES.items():
+            rows = model.objects.order_by().values_list(
+                'pk', 'name', ref_field
+            )
+            for pk, name, ref in rows.iterator():
+                entry = (normalize(name), name, ref)
+                entries[kind].append(entry)
+                keys[kind, pk] = entry
+            entries[kind].sort()
+        with self._lock:
+            self._entries = entries
+            self._keys = keys
+            self._built = True
+
+    def clear(self):
+        with self._lock:
+            self._built = False
+            self._entries = {kind: [] for kind in SOURCES}
+            self._keys = {}
+
+    def update(self, kind, pk, name, ref):
+        with self._lock:
+            if not self._built:
+                return
+            self._discard(kind, pk)
+            entry = (normalize(name), name, ref)
+            insort(self._entries[kind], entry)
+            self._keys[kind, pk] = entry
+
+    def remove(self, kind, pk):
+        with self._lock:
+            if self._built:
+                self._discard(kind, pk)
+
+    def _discard(self, kind, pk):
+        entry = self._keys.pop((kind, pk), None)
+        if entry is None:
+            return
+        entries = self._entries[kind]
+        position = bisect_left(entries, entry)
+        if position < len(entries) and entries[position] == entry:
+            del entries[position]
+
+    def search(self, prefix, limit, kinds=SOURCES):
+        """Первые limit подсказок в алфавитном порядке."""
+        self.ensure_built()
+        key = normalize(prefix)
+        upper = (key + MAX_CHAR,)
+        with self._lock:
+            ranges = []
+            for kind in kinds:
+                entries = self._entries[kind]
+                start = bisect_left(entries, (key,))
+                end = bisect_left(entries, upper, start)
+                ranges.append([
+                    (entry, kind)
+                    for entry in entries[start:min(end, start + limit)]
+                ])
+        suggestions = merge(*ranges, key=lambda item: item[0][0])
+        return [
+            {'type': kind, SOURCES[kind][1]: ref, 'name': name}
+            for (_, name, ref), kind in islice(suggestions, limit)
+        ]
+
+
+prefix_index = PrefixIndex()
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Category)
+def index_saved(sender, instance, **kwargs):
+    kind = next(kind for kind, (model, _) in SOURCES.items()
+                if model is sender)
+    pk, name = instance.pk, instance.name
+    ref = getattr(instance, SOURCES[kind][1])
+    transaction.on_commit(lambda: prefix_index.apply_change(
+        prefix_index.update, kind, pk, name, ref
+    ))
+
+
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Category)
+def index_deleted(sender, instance, **kwargs):
+    kind = next(kind for kind, (model, _) in SOURCES.items()
+                if model is sender)
+    pk = instance.pk
+    transaction.on_commit(lambda: prefix_index.apply_change(
+        prefix_index.remove, kind, pk
+    ))
@@ -0,0 +1,172 @@
+"""Кэш ответов на безопасные запросы с версиями ресурсов."""
+
+from hashlib import md5
+from time import time_ns
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from rest_framework import permissions
+from rest_framework.response import Response
+
+VERSION_KEY = 'api:version:{scope}'
+COUNTER_KEY = 'api:counter:{name}'
+RESPONSE_KEY = 'api:response:{digest}'
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def get_versions(scopes):
+    """
+    Текущие версии ресурсов: время последнего изменения в наносекундах.
+    Отсутствующая версия создаётся из текущего времени, поэтому после
+    вытеснения из кэша она не совпадёт ни с одной из прежних.
+    """
+    cache = get_cache()
+    keys = [VERSION_KEY.format(scope=scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def invalidate(scopes):
+    """Обновляет версии ресурсов, делая их закэшированные ответы старыми."""
+    cache = get_cache()
+    for scope in scopes:
+        key = VERSION_KEY.format(scope=scope)
+        version = cache.get(key, 0)
+        cache.set(key, max(time_ns(), version + 1), None)
+
+
+class VersionCounter:
+    """
+    Общий для процессов счётчик изменений в кэше API. Увеличивается
+    атомарно, поэтому процесс по новому значению видит, были ли с его
+    версии изменения в других процессах. Начинается с текущего времени:
+    после вытеснения из кэша не совпадёт с прежними значениями.
+    """
+    def __init__(self, name):
+        self.key = COUNTER_KEY.format(name=name)
+
+    def get(self):
+        cache = get_cache()
+        value = cache.get(self.key)
+        if value is None:
+            cache.add(self.key, time_ns(), None)
+            value = cache.get(self.key)
+        return value
+
+    def increment(self):
+        cache = get_cache()
+        try:
+            return cache.incr(self.key)
+        except ValueError:
+            cache.add(self.key, time_ns(), None)
+            return cache.incr(self.key)
+
+
+class SharedIndexMixin:
+    """
+    Индекс в памяти процесса, согласованный с другими процессами через
+    счётчик `counter`: при расхождении версий индекс строится заново
+    методом build(). Ожидает атрибуты _lock и _built.
+    """
+    counter = None
+    _version = None
+
+    def ensure_built(self):
+        version = self.counter.get()
+        if not self._built or self._version != version:
+            with self._lock:
+                if not self._built or self._version != version:
+                    self.build()
+                    self._version = version
+
+    def apply_change(self, func, *args):
+        """
+        Применяет изменение, сделанное этим процессом, если до него индекс
+        был актуален; иначе он будет построен заново при обращении.
+        """
+        version = self.counter.increment()
+        with self._lock:
+            if self._built and self._version == version - 1:
+                func(*args)
+                self._version = version
+            else:
+                self._built = False
+
+
+def get_digest(scopes, request):
+    """
+    Отпечаток ответа (ETag) по версиям ресурсов и пути запроса,
+    без обращения к базе данных.
+    Last-Modified не выдаётся: его точность — секунда, и изменение
+    в ту же секунду, что и ответ, осталось бы незамеченным клиентом,
+    присылающим только If-Modified-Since.
+    """
+    versions = get_versions(scopes)
+    source = f'{versions}:{request.get_full_path()}'
+    return md5(source.encode()).hexdigest()
+
+
+class InvalidateCacheMixin:
+    """
+    Успешные изменяющие запросы через viewset увеличивают версии
+    ресурсов из get_invalidated_scopes().
+    """
+    invalidated_scopes = ()
+
+    def get_invalidated_scopes(self):
+        return self.invalidated_scopes
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if (request.method not in permissions.SAFE_METHODS
+                and response.status_code < 400):
+            invalidate(self.get_invalidated_scopes())
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class CachedResponseMixin(InvalidateCacheMixin):
+    """
+    Кэширует данные ответов list и retrieve по пути и строке запроса
+    с учётом версий ресурсов из get_cache_scopes().
+    На условные запросы с актуальным If-None-Match отвечает
+    304 Not Modified, не выполняя запросов к базе.
+    """
+    cache_scopes = ()
+
+    def get_cache_scopes(self):
+        return self.cache_scopes
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        digest = get_digest(self.get_cache_scopes(), request)
+        etag = quote_etag(digest)
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+
+        key = RESPONSE_KEY.format(digest=digest)
+        data = get_cache().get(key)
+        if data is not None:
+            response = Response(data)
+        else:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            get_cache().set(key, response.data, settings.API_CACHE_TIMEOUT)
+        response['ETag'] = etag
+        return response
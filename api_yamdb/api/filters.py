@@ -1,12 +1,111 @@
+import json
+from functools import reduce
+from operator import or_
+
 import django_filters as filters
+from django.db import connection
+from django.db.models import Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Concat, Lower
+from rest_framework.filters import OrderingFilter, SearchFilter
 
 from reviews.models import Title
+from reviews.search import search_titles
+from .genre_index import bitmap_to_ids, genre_index
+
+# Наибольший символ Unicode: всё, что начинается с префикса, меньше
+# префикса с этим символом на конце.
+MAX_CHAR = '\U0010ffff'
+GENRE_MATCH_CHOICES = (('any', 'any'), ('all', 'all'))
 
 
 class TitleFilter(filters.FilterSet):
-    genre = filters.CharFilter(field_name='genre__slug')
+    genre = filters.CharFilter(method='filter_genre')
+    genre_match = filters.ChoiceFilter(
+        choices=GENRE_MATCH_CHOICES, method='filter_genre_match'
+    )
     category = filters.CharFilter(field_name='category__slug')
+    search = filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Title
         fields = ('name', 'year')
+
+    def filter_genre(self, queryset, name, value):
+        """
+        `?genre=drama,comedy` — произведения хотя бы одного из жанров,
+        с `&genre_match=all` — всех перечисленных жанров сразу.
+        Отбор выполняется по битовым картам жанров в памяти, в базу
+        передаётся только готовый список id.
+        """
+        slugs = [slug.strip() for slug in value.split(',') if slug.strip()]
+        if not slugs:
+            return queryset
+        match_all = self.form.cleaned_data.get('genre_match') == 'all'
+        ids = bitmap_to_ids(genre_index.match(slugs, match_all))
+        if not ids:
+            return queryset.none()
+        if connection.vendor == 'sqlite':
+            # Один параметр вместо тысяч: список разворачивает json_each.
+            ids = RawSQL('SELECT value FROM json_each(%s)', [json.dumps(ids)])
+        return queryset.filter(pk__in=ids)
+
+    def filter_genre_match(self, queryset, name, value):
+        return queryset
+
+    def filter_search(self, queryset, name, value):
+        return search_titles(queryset, value)
+
+
+class PrefixSearchFilter(SearchFilter):
+    """
+    Поиск по началу значения поля без учёта регистра.
+    Условие записывается как диапазон
+    `lower(prefix) <= lower(field) < lower(prefix) + MAX_CHAR`,
+    поэтому выполняется по индексу `lower(field)`, а не полным
+    просмотром таблицы. Обе стороны приводит к нижнему регистру
+    база данных, так что правила регистра у них совпадают.
+    """
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        prefix = request.query_params.get(self.search_param, '').strip()
+        if not search_fields or not prefix:
+            return queryset
+        lower_prefix = Lower(Value(prefix))
+        upper_bound = Concat(lower_prefix, Value(MAX_CHAR))
+        annotations = {
+            f'{field}_lower': Lower(field) for field in search_fields
+        }
+        conditions = [
+            Q(**{
+                f'{alias}__gte': lower_prefix,
+                f'{alias}__lt': upper_bound,
+            })
+            for alias in annotations
+        ]
+        return queryset.annotate(**annotations).filter(
+            reduce(or_, conditions)
+        )
+
+
+class StableOrderingFilter(OrderingFilter):
+    """
+    Упорядочивание `?ordering=-rating,year,name` с id последним полем
+    в направлении первого: порядок однозначен, а сортировка по убыванию
+    читает составной индекс `(..., rating, id)` в обратную сторону.
+    Без параметра сохраняет порядок, уже заданный другими фильтрами,
+    например ранжирование полнотекстового поиска.
+    """
+    def filter_queryset(self, request, queryset, view):
+        if (self.ordering_param not in request.query_params
+                and queryset.query.order_by):
+            return queryset
+        return super().filter_queryset(request, queryset, view)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(super().get_ordering(request, queryset, view) or ())
+        if ordering and not any(
+            field.lstrip('-') in ('id', 'pk') for field in ordering
+        ):
+            ordering.append('-id' if ordering[0].startswith('-') else 'id')
+        return ordering
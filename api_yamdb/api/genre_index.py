@@ -0,0 +1,164 @@
+"""Битовые карты принадлежности произведений жанрам."""
+
+import threading
+from functools import reduce
+from operator import and_, or_
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from reviews.models import Genre, Title
+from .cache import SharedIndexMixin, VersionCounter
+
+# Номера установленных битов для каждого значения байта.
+BYTE_BITS = tuple(
+    tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256)
+)
+
+
+def bitmap_to_ids(bitmap):
+    """Номера установленных битов по возрастанию."""
+    ids = []
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+    for offset, byte in enumerate(data):
+        if byte:
+            base = offset * 8
+            ids.extend(base + bit for bit in BYTE_BITS[byte])
+    return ids
+
+
+def ids_to_bitmap(ids):
+    bitmap = 0
+    for pk in ids:
+        bitmap |= 1 << pk
+    return bitmap
+
+
+class GenreBitmapIndex(SharedIndexMixin):
+    """
+    Для каждого жанра хранит битовую карту: бит с номером id произведения
+    установлен, если произведение относится к жанру. Пересечение и
+    объединение жанров считаются побитовыми операциями над целыми числами.
+    Строится из Title.genre.through при первом обращении и обновляется
+    сигналами изменения связей. Изменения в других процессах видны
+    по общему счётчику версий.
+    """
+    counter = VersionCounter('genre-index')
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built = False
+        self._bitmaps = {}
+        self._slugs = {}
+
+    def build(self):
+        bitmaps = {}
+        slugs = dict(Genre.objects.order_by().values_list('slug', 'pk'))
+        links = Title.genre.through.objects.order_by().values_list(
+            'genre_id', 'title_id'
+        )
+        for genre_id, title_id in links.iterator():
+            bitmaps[genre_id] = bitmaps.get(genre_id, 0) | 1 << title_id
+        with self._lock:
+            self._bitmaps = bitmaps
+            self._slugs = slugs
+            self._built = True
+
+    def clear(self):
+        with self._lock:
+            self._built = False
+            self._bitmaps = {}
+            self._slugs = {}
+
+    def set_genre(self, genre_id, slug):
+        with self._lock:
+            if not self._built:
+                return
+            for old_slug, pk in list(self._slugs.items()):
+                if pk == genre_id:
+                    del self._slugs[old_slug]
+            self._slugs[slug] = genre_id
+
+    def remove_genre(self, genre_id):
+        with self._lock:
+            if not self._built:
+                return
+            self._bitmaps.pop(genre_id, None)
+            self._slugs = {
+                slug: pk for slug, pk in self._slugs.items()
+                if pk != genre_id
+            }
+
+    def clear_genre(self, genre_id):
+        with self._lock:
+            if self._built:
+                self._bitmaps[genre_id] = 0
+
+    def link(self, genre_ids, title_ids, linked=True):
+        with self._lock:
+            if not self._built:
+                return
+            titles = ids_to_bitmap(title_ids)
+            for genre_id in genre_ids:
+                bitmap = self._bitmaps.get(genre_id, 0)
+                if linked:
+                    self._bitmaps[genre_id] = bitmap | titles
+                else:
+                    self._bitmaps[genre_id] = bitmap & ~titles
+
+    def unlink_titles(self, title_ids):
+        with self._lock:
+            if self._built:
+                self.link(list(self._bitmaps), title_ids, linked=False)
+
+    def match(self, slugs, match_all=False):
+        """
+        Битовая карта произведений, относящихся ко всем (match_all)
+        или хотя бы к одному из жанров slugs.
+        """
+        self.ensure_built()
+        with self._lock:
+            bitmaps = [
+                self._bitmaps.get(self._slugs.get(slug), 0) for slug in slugs
+            ]
+        if not bitmaps:
+            return 0
+        return reduce(and_ if match_all else or_, bitmaps)
+
+
+genre_index = GenreBitmapIndex()
+
+
+def on_commit(func, *args):
+    transaction.on_commit(lambda: genre_index.apply_change(func, *args))
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def index_title_genres(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ('post_add', 'post_remove'):
+        linked = action == 'post_add'
+        if reverse:
+            on_commit(genre_index.link, [instance.pk], pk_set, linked)
+        else:
+            on_commit(genre_index.link, pk_set, [instance.pk], linked)
+    elif action == 'post_clear':
+        if reverse:
+            on_commit(genre_index.clear_genre, instance.pk)
+        else:
+            on_commit(genre_index.unlink_titles, [instance.pk])
+
+
+@receiver(post_delete, sender=Title)
+def index_title_deleted(sender, instance, **kwargs):
+    on_commit(genre_index.unlink_titles, [instance.pk])
+
+
+@receiver(post_save, sender=Genre)
+def index_genre_saved(sender, instance, **kwargs):
+    on_commit(genre_index.set_genre, instance.pk, instance.slug)
+
+
+@receiver(post_delete, sender=Genre)
+def index_genre_deleted(sender, instance, **kwargs):
+    on_commit(genre_index.remove_genre, instance.pk)
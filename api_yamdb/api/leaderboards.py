@@ -0,0 +1,176 @@
+"""Списки лучших произведений по взвешенному рейтингу."""
+
+import threading
+from bisect import insort
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from reviews.models import Category, Genre, Title
+from .cache import get_cache, get_versions, invalidate
+
+BOARD_KEY = 'api:top:{version}:{kind}:{slug}'
+# Списки, построенные в текущей версии.
+BOARDS_KEY = 'api:top:{version}'
+# Версия, при смене которой все списки строятся заново.
+BOARDS_SCOPE = 'leaderboards'
+ALL = 'all'
+_lock = threading.Lock()
+
+
+def get_capacity():
+    """Списки хранятся с запасом, чтобы переживать падение позиций."""
+    return settings.LEADERBOARD_SIZE * 2
+
+
+def get_version():
+    version, = get_versions([BOARDS_SCOPE])
+    return version
+
+
+def get_key(kind, slug='', version=None):
+    if version is None:
+        version = get_version()
+    return BOARD_KEY.format(version=version, kind=kind, slug=slug)
+
+
+def build_board(kind, slug=''):
+    """
+    Читает первые позиции по индексу взвешенного рейтинга.
+    Флаг complete означает, что в списке все произведения с рейтингом.
+    """
+    queryset = Title.objects.filter(weighted_rating__isnull=False)
+    if kind != ALL:
+        queryset = queryset.filter(**{f'{kind}__slug': slug})
+    capacity = get_capacity()
+    rows = list(
+        queryset.order_by('-weighted_rating', '-id')
+        .values_list('weighted_rating', 'id')[:capacity + 1]
+    )
+    return {
+        'entries': [list(row) for row in rows[:capacity]],
+        'complete': len(rows) <= capacity,
+    }
+
+
+def get_top(kind=ALL, slug='', limit=None):
+    """
+    Пары (взвешенный рейтинг, id) лучших произведений по убыванию.
+    Список берётся из кэша и строится заново только при отсутствии.
+    """
+    cache = get_cache()
+    version = get_version()
+    key = get_key(kind, slug, version)
+    board = cache.get(key)
+    if board is None:
+        board = build_board(kind, slug)
+        cache.set(key, board, settings.LEADERBOARD_TIMEOUT)
+        with _lock:
+            boards_key = BOARDS_KEY.format(version=version)
+            boards = cache.get(boards_key, set())
+            boards.add((kind, slug))
+            cache.set(boards_key, boards, settings.LEADERBOARD_TIMEOUT)
+    return board['entries'][:limit or settings.LEADERBOARD_SIZE]
+
+
+def place(entries, title_id, score):
+    """
+    Перемещает произведение на позицию score в списке, упорядоченном
+    по убыванию; с рейтингом None произведение из списка убирается.
+    """
+    entries[:] = [entry for entry in entries if entry[1] != title_id]
+    if score is None:
+        return
+    # insort работает по возрастанию, поэтому ключи берутся с минусом.
+    keys = [(-value, -pk) for value, pk in entries]
+    insort(keys, (-score, -title_id))
+    entries[:] = [[-value, -pk] for value, pk in keys]
+
+
+def update_title(title_id):
+    """
+    Переставляет произведение во всех списках, в которые оно входит,
+    после изменения его рейтинга.
+    Список, который после выбывания произведения стал короче
+    LEADERBOARD_SIZE и не содержит всех произведений, сбрасывается
+    и будет построен заново при следующем обращении.
+    """
+    cache = get_cache()
+    version = get_version()
+    built = cache.get(BOARDS_KEY.format(version=version))
+    if not built:
+        return
+    rows = list(
+        Title.objects.filter(pk=title_id)
+        .values_list('weighted_rating', 'category__slug', 'genre__slug')
+    )
+    if not rows:
+        invalidate([BOARDS_SCOPE])
+        return
+    score = rows[0][0]
+    boards = {(ALL, '')}
+    for _, category, genre in rows:
+        boards.add(('category', category))
+        boards.add(('genre', genre))
+
+    capacity = get_capacity()
+    with _lock:
+        for kind, slug in boards & built:
+            key = get_key(kind, slug, version)
+            board = cache.get(key)
+            if board is None:
+                continue
+            entries = board['entries']
+            place(entries, title_id, score)
+            if (not board['complete'] and entries
+                    and entries[-1][1] == title_id):
+                # За последней позицией неполного списка могут быть
+                # произведения выше, чем это.
+                entries.pop()
+            if len(entries) > capacity:
+                del entries[capacity:]
+                board['complete'] = False
+            if (not board['complete']
+                    and len(entries) < settings.LEADERBOARD_SIZE):
+                cache.delete(key)
+            else:
+                cache.set(key, board, settings.LEADERBOARD_TIMEOUT)
+
+
+def update_title_on_commit(title_id):
+    transaction.on_commit(lambda: update_title(title_id))
+
+
+def invalidate_boards():
+    transaction.on_commit(lambda: invalidate([BOARDS_SCOPE]))
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def title_changed(sender, instance, **kwargs):
+    """
+    Смена категории или удаление произведения с рейтингом сбрасывает
+    все списки; произведения без отзывов в списки не входят.
+    """
+    if instance.weighted_rating is not None:
+        invalidate_boards()
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, instance, action, reverse, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse or instance.weighted_rating is not None:
+        invalidate_boards()
+
+
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Category)
+def group_deleted(sender, instance, **kwargs):
+    """
+    Удаление жанра или категории меняет произведения без сигналов
+    о них: связи удаляются, а категория обнуляется запросом UPDATE.
+    """
+    invalidate_boards()
@@ -0,0 +1,167 @@
+"""Учёт запросов к базе и времени обработки запросов к API."""
+
+import threading
+from collections import deque
+from contextlib import ExitStack
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+UNRESOLVED_ROUTE = '<unresolved>'
+
+
+def get_percentile(ordered, percent):
+    """Процентиль упорядоченной выборки методом ближайшего ранга."""
+    if not ordered:
+        return None
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[int(rank) - 1]
+
+
+class QueryCounter:
+    """Обёртка выполнения SQL: считает запросы и их суммарное время."""
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += perf_counter() - started
+            self.count += 1
+
+
+class RouteStats:
+    """
+    Статистика по маршрутам за последние `window` запросов каждого:
+    процентили времени обработки, среднее число запросов, время в базе
+    и время сериализации.
+    """
+    def __init__(self, window):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = {}
+
+    def add(self, route, total, queries, db_time, serialize_time=0.0):
+        with self._lock:
+            samples = self._samples.get(route)
+            if samples is None:
+                samples = self._samples[route] = deque(maxlen=self.window)
+            samples.append((total, queries, db_time, serialize_time))
+
+    def clear(self):
+        with self._lock:
+            self._samples = {}
+
+    def summary(self):
+        with self._lock:
+            samples = {
+                route: list(values) for route, values in self._samples.items()
+            }
+        result = []
+        for route, values in sorted(samples.items()):
+            count = len(values)
+            totals = sorted(total for total, _, _, _ in values)
+            result.append({
+                'route': route,
+                'count': count,
+                'p50_ms': get_percentile(totals, 50) * 1000,
+                'p95_ms': get_percentile(totals, 95) * 1000,
+                'p99_ms': get_percentile(totals, 99) * 1000,
+                'mean_queries': sum(q for _, q, _, _ in values) / count,
+                'mean_db_ms': sum(db for _, _, db, _ in values) / count * 1000,
+                'mean_serialize_ms': (
+                    sum(ser for _, _, _, ser in values) / count * 1000
+                ),
+            })
+        return result
+
+
+route_stats = RouteStats(settings.API_METRICS_WINDOW)
+
+
+class SerializeTimingMixin:
+    """
+    Выделяет сериализацию ответов представления в отдельную фазу
+    `serialize` QueryMetricsMiddleware. Данные сериализатора для чтения
+    вычисляются сразу в `get_serializer` и сохраняются в нём; время
+    учитывается за вычетом запросов к базе, выполненных при этом.
+    Сериализаторы с `data=` отвечают одним сохранённым объектом,
+    их сериализация остаётся в фазе `app`.
+    """
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        request = self.request._request
+        if (not hasattr(request, '_metrics_counter') or 'data' in kwargs
+                or not (args or 'instance' in kwargs)):
+            return serializer
+        counter = request._metrics_counter
+        started = perf_counter()
+        db_started = counter.duration
+        try:
+            serializer.data
+        finally:
+            request._metrics_serialize += (
+                perf_counter() - started - (counter.duration - db_started)
+            )
+        return serializer
+
+
+class QueryMetricsMiddleware:
+    """
+    Считает SQL-запросы и время их выполнения, время работы
+    представления, сериализации (для представлений с SerializeTimingMixin)
+    и отрисовки ответа. Добавляет к ответу заголовки
+    `Server-Timing` и `X-DB-Queries` и накапливает статистику по маршрутам.
+    При API_METRICS_ENABLED = False не подключается вовсе.
+    """
+    def __init__(self, get_response):
+        if not settings.API_METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        request._metrics_counter = counter
+        request._metrics_serialize = 0.0
+        request._metrics_render_started = None
+        started = perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+        finished = perf_counter()
+
+        total = finished - started
+        render_started = request._metrics_render_started or finished
+        render = finished - render_started
+        serialize = request._metrics_serialize
+        app = max(
+            render_started - started - counter.duration - serialize, 0
+        )
+        response['Server-Timing'] = ', '.join((
+            f'db;desc="{counter.count} queries";dur='
+            f'{counter.duration * 1000:.2f}',
+            f'app;dur={app * 1000:.2f}',
+            f'serialize;dur={serialize * 1000:.2f}',
+            f'render;dur={render * 1000:.2f}',
+            f'total;dur={total * 1000:.2f}',
+        ))
+        response['X-DB-Queries'] = str(counter.count)
+
+        match = request.resolver_match
+        route = match.view_name if match else UNRESOLVED_ROUTE
+        route_stats.add(
+            f'{request.method} {route}', total, counter.count,
+            counter.duration, serialize,
+        )
+        return response
+
+    def process_template_response(self, request, response):
+        # Ответы DRF отрисовываются сразу после этого вызова.
+        request._metrics_render_started = perf_counter()
+        return response
@@ -0,0 +1,100 @@
+"""Обнаружение повторяющихся однотипных SQL-запросов (N+1)."""
+
+import re
+import warnings
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+IGNORED_STATEMENTS = ('SAVEPOINT', 'RELEASE', 'ROLLBACK', 'BEGIN', 'COMMIT')
+NORMALIZE = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+
+class NPlusOneError(Exception):
+    pass
+
+
+class NPlusOneWarning(UserWarning):
+    pass
+
+
+def fingerprint(sql):
+    """
+    Отпечаток запроса: литералы и параметры заменены на `?`,
+    списки IN (...) любой длины сведены к одному виду.
+    """
+    for pattern, replacement in NORMALIZE:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+class QueryFingerprints:
+    """
+    Обёртка выполнения SQL, считающая запросы по отпечаткам.
+    Как контекстный менеджер подключается ко всем соединениям.
+    """
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.counts = Counter()
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.lstrip().upper().startswith(IGNORED_STATEMENTS):
+            self.counts[fingerprint(sql)] += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    def get_repeated(self):
+        """Отпечатки, повторившиеся больше threshold раз."""
+        return {
+            sql: count for sql, count in self.counts.most_common()
+            if count > self.threshold
+        }
+
+    def check(self, label, raise_error=False):
+        repeated = self.get_repeated()
+        if not repeated:
+            return
+        message = f'{label}: повторяющиеся запросы (N+1):\n' + '\n'.join(
+            f'  {count} x {sql}' for sql, count in repeated.items()
+        )
+        if raise_error:
+            raise NPlusOneError(message)
+        warnings.warn(message, NPlusOneWarning)
+
+
+class NPlusOneMiddleware:
+    """
+    Предупреждает (или с NPLUSONE_RAISE выбрасывает NPlusOneError),
+    если за один запрос к API однотипный SQL-запрос выполнился больше
+    NPLUSONE_THRESHOLD раз. Подключается при NPLUSONE_ENABLED.
+    """
+    def __init__(self, get_response):
+        if not settings.NPLUSONE_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryFingerprints(settings.NPLUSONE_THRESHOLD) as queries:
+            response = self.get_response(request)
+        queries.check(
+            f'{request.method} {request.path}', settings.NPLUSONE_RAISE
+        )
+        return response
@@ -0,0 +1,277 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import F, Q
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+# Целые за пределами 64 бит база данных не принимает.
+MIN_INT, MAX_INT = -2 ** 63, 2 ** 63 - 1
+
+
+class KeysetPagination(pagination.BasePagination):
+    """
+    Постраничный вывод по ключу (keyset).
+    Страница выбирается условием по полям `ordering` после последней
+    записи предыдущей страницы, без OFFSET. Поле с префиксом `-`
+    упорядочивается по убыванию; NULL считается меньше любого значения.
+    Общее количество записей считается только по запросу `?count=true`.
+    """
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    page_size_query_param = 'limit'
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 100
+    ordering = ('id',)
+    invalid_cursor_message = 'Некорректный курсор.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.model = queryset.model
+        self.annotations = queryset.query.annotations
+        self.keyset_ordering = tuple(
+            self.get_ordering(request, queryset, view)
+        )
+        position, reverse = self.decode_cursor(request)
+        self.count = None
+        if self.count_requested(request):
+            self.count = queryset.count()
+
+        if position is not None:
+            queryset = queryset.filter(self.get_keyset_filter(
+                position, reverse
+            ))
+        results = list(
+            queryset.order_by(*self.get_order_by(reverse))
+            [:self.page_size + 1]
+        )
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        if reverse:
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.first_position = self.last_position = None
+        if results:
+            self.first_position = self.get_position(results[0])
+            self.last_position = self.get_position(results[-1])
+        return results
+
+    def get_paginated_response(self, data):
+        response = OrderedDict()
+        if self.count is not None:
+            response['count'] = self.count
+        response['next'] = self.get_next_link()
+        response['previous'] = self.get_previous_link()
+        response['results'] = data
+        return Response(response)
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def count_requested(self, request):
+        value = request.query_params.get(self.count_query_param, '')
+        return value.lower() in ('1', 'true', 'yes')
+
+    def get_ordering(self, request, queryset, view):
+        return self.ordering
+
+    def get_fields(self, reverse=False):
+        """Пары (поле, по убыванию) с учётом направления обхода."""
+        return [
+            (field.lstrip('-'), field.startswith('-') != reverse)
+            for field in self.keyset_ordering
+        ]
+
+    def get_order_by(self, reverse=False):
+        return [
+            F(field).desc(nulls_last=True) if descending
+            else F(field).asc(nulls_first=True)
+            for field, descending in self.get_fields(reverse)
+        ]
+
+    def get_position(self, obj):
+        return [getattr(obj, field) for field, _ in self.get_fields()]
+
+    def get_keyset_filter(self, position, reverse):
+        """
+        Строит условие (a > x) OR (a = x AND b > y) OR ...
+        для позиции курсора и направления обхода.
+        """
+        fields = self.get_fields(reverse)
+        conditions = []
+        for idx, (field, descending) in enumerate(fields):
+            condition = Q()
+            for (previous, _), value in zip(fields[:idx], position[:idx]):
+                if value is None:
+                    condition &= Q(**{f'{previous}__isnull': True})
+                else:
+                    condition &= Q(**{previous: value})
+            value = position[idx]
+            if value is None:
+                if descending:
+                    continue
+                condition &= Q(**{f'{field}__isnull': False})
+            elif descending:
+                condition &= (
+                    Q(**{f'{field}__lt': value})
+                    | Q(**{f'{field}__isnull': True})
+                )
+            else:
+                condition &= Q(**{f'{field}__gt': value})
+            conditions.append(condition)
+        if not conditions:
+            return Q(pk__in=[])
+        return reduce(or_, conditions)
+
+    def encode_cursor(self, position, reverse=False):
+        payload = {'p': position}
+        if reverse:
+            payload['r'] = 1
+        data = json.dumps(payload, default=str, separators=(',', ':'))
+        cursor = urlsafe_b64encode(data.encode()).decode()
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            payload = json.loads(urlsafe_b64decode(cursor.encode()))
+            position = payload['p']
+            reverse = bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if (not isinstance(position, list)
+                or len(position) != len(self.keyset_ordering)):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            position = [
+                value if field is None else field.to_python(value)
+                for field, value in zip(self.get_model_fields(), position)
+            ]
+        except (ValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if any(isinstance(value, int) and not MIN_INT <= value <= MAX_INT
+               for value in position):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def get_model_fields(self):
+        """
+        Поля модели для значений позиции курсора, для аннотаций —
+        их output_field; None, если поле не найдено.
+        """
+        fields = []
+        for name, _ in self.get_fields():
+            if name in self.annotations:
+                fields.append(self.annotations[name].output_field)
+                continue
+            model = self.model
+            field = None
+            try:
+                for part in name.split('__'):
+                    field = (
+                        model._meta.pk if part == 'pk'
+                        else model._meta.get_field(part)
+                    )
+                    model = field.related_model
+            except (AttributeError, FieldDoesNotExist):
+                field = None
+            fields.append(field)
+        return fields
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.last_position)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.first_position is None:
+            url = self.request.build_absolute_uri()
+            return replace_query_param(url, self.cursor_query_param, '')
+        return self.encode_cursor(self.first_position, reverse=True)
+
+
+class OptionalKeysetPagination(KeysetPagination):
+    """
+    Включает постраничный вывод по ключу только при наличии параметра
+    `?cursor=` в запросе, иначе использует `offset_pagination_class`.
+    """
+    offset_pagination_class = pagination.PageNumberPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.offset_paginator = None
+        if self.cursor_query_param in request.query_params:
+            return super().paginate_queryset(queryset, request, view)
+        self.offset_paginator = self.offset_pagination_class()
+        return self.offset_paginator.paginate_queryset(
+            queryset, request, view
+        )
+
+    def get_paginated_response(self, data):
+        if self.offset_paginator is not None:
+            return self.offset_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class TitlePagination(OptionalKeysetPagination):
+    """Курсор следует порядку, заданному параметром `?ordering=`."""
+    ordering = ('year', 'id')
+    offset_pagination_class = pagination.LimitOffsetPagination
+
+    def get_ordering(self, request, queryset, view):
+        return queryset.query.order_by or self.ordering
+
+
+class PubDatePagination(OptionalKeysetPagination):
+    ordering = ('pub_date', 'id')
+
+
+class UserPagination(OptionalKeysetPagination):
+    ordering = ('id',)
+
+
+class ChangeFeedPagination(KeysetPagination):
+    """
+    Лента изменений по возрастанию id после курсора `?since=`.
+    Ссылка `next` есть и на последней странице: по ней потребитель
+    позже забирает только новые изменения.
+    """
+    cursor_query_param = 'since'
+    page_size = 100
+    max_page_size = 1000
+
+    def decode_cursor(self, request):
+        self.since, reverse = super().decode_cursor(request)
+        return self.since, reverse
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict((
+            ('next', self.get_next_link()),
+            ('has_more', self.has_next),
+            ('results', data),
+        )))
+
+    def get_next_link(self):
+        return self.encode_cursor(self.last_position or self.since or [0])
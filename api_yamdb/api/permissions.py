@@ -1,5 +1,7 @@
 from rest_framework import permissions
 
+from reviews.export import PRIVATE_SHEETS
+
 
 class IsAdminModeratorOwnerOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
@@ -31,3 +33,14 @@ class IsAdminOrReadOnly(permissions.BasePermission):
         if request.user.is_authenticated:
             return request.user.is_admin
         return request.method in permissions.SAFE_METHODS
+
+
+class IsAdminOrPublicSheet(permissions.BasePermission):
+    """
+    Открытые таблицы выгрузки доступны всем, таблицы с личными
+    данными — только администратору.
+    """
+    def has_permission(self, request, view):
+        if view.kwargs.get('sheet') not in PRIVATE_SHEETS:
+            return True
+        return request.user.is_authenticated and request.user.is_admin
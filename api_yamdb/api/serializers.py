@@ -1,13 +1,17 @@
+from django.conf import settings
 from django.contrib.auth.validators import UnicodeUsernameValidator
-from django.db.models import Avg
 from rest_framework import serializers, validators
-from rest_framework.exceptions import ValidationError
-from rest_framework.generics import get_object_or_404
 
-from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.models import ChangeLog, Category, Comment, Genre, Review, Title
+from reviews.ratings import get_rating_distribution
 from reviews.validators import validate_year
 from users.models import User
 from users.validators import validate_username
+from .autocomplete import SOURCES
+
+MAX_TITLE_IDS = 100
+# Наибольшее значение знакового 64-битного целого столбца id.
+MAX_ID = 2 ** 63 - 1
 
 
 class GenreSerializer(serializers.ModelSerializer):
@@ -43,18 +47,69 @@ class TitleGetSerializer(serializers.ModelSerializer):
     year = serializers.IntegerField(required=True)
     genre = GenreSerializer(read_only=True, many=True)
     category = CategorySerializer(read_only=True)
-    rating = serializers.SerializerMethodField()
+    rating = serializers.IntegerField(read_only=True, allow_null=True)
 
     class Meta:
         model = Title
-        fields = '__all__'
+        fields = (
+            'id',
+            'name',
+            'year',
+            'rating',
+            'weighted_rating',
+            'description',
+            'genre',
+            'category',
+        )
         read_only_fields = ('id',)
 
-    def get_rating(self, obj):
-        rating = obj.reviews.aggregate(rating=Avg('score'))
-        if not rating['rating']:
-            return None
-        return int(rating['rating'])
+
+class RatingDistributionField(serializers.Field):
+    """Гистограмма оценок произведения с медианой и процентилями."""
+    def __init__(self, **kwargs):
+        kwargs.update(source='*', read_only=True)
+        super().__init__(**kwargs)
+
+    def to_representation(self, title):
+        return get_rating_distribution(title.get_score_counts())
+
+
+class TitleDetailSerializer(TitleGetSerializer):
+    rating_distribution = RatingDistributionField()
+
+    class Meta(TitleGetSerializer.Meta):
+        fields = (*TitleGetSerializer.Meta.fields, 'rating_distribution')
+
+
+class TitleDistributionSerializer(serializers.ModelSerializer):
+    rating_distribution = RatingDistributionField()
+
+    class Meta:
+        model = Title
+        fields = ('id', 'rating_distribution')
+
+
+class TitleIdsSerializer(serializers.Serializer):
+    ids = serializers.CharField(required=True)
+
+    def validate_ids(self, value):
+        try:
+            ids = list(dict.fromkeys(
+                int(pk) for pk in value.split(',') if pk.strip()
+            ))
+        except ValueError:
+            raise serializers.ValidationError(
+                'Укажите id произведений через запятую.'
+            )
+        if not ids or len(ids) > MAX_TITLE_IDS:
+            raise serializers.ValidationError(
+                f'Укажите от 1 до {MAX_TITLE_IDS} id произведений.'
+            )
+        if not all(1 <= pk <= MAX_ID for pk in ids):
+            raise serializers.ValidationError(
+                f'id произведений должны быть от 1 до {MAX_ID}.'
+            )
+        return ids
 
 
 class TitleSerializer(TitleGetSerializer):
@@ -111,13 +166,39 @@ class SignUpSerializer(serializers.Serializer):
     email = serializers.EmailField(required=True, max_length=254)
 
 
+class AutocompleteSerializer(serializers.Serializer):
+    q = serializers.CharField(required=True, max_length=256)
+    type = serializers.MultipleChoiceField(
+        choices=tuple(SOURCES), required=False
+    )
+    limit = serializers.IntegerField(
+        required=False, min_value=1, max_value=50, default=10
+    )
+
+
+class TopTitlesSerializer(serializers.Serializer):
+    genre = serializers.SlugField(required=False)
+    category = serializers.SlugField(required=False)
+    limit = serializers.IntegerField(
+        required=False, min_value=1, max_value=settings.LEADERBOARD_SIZE,
+        default=10,
+    )
+
+    def validate(self, data):
+        if 'genre' in data and 'category' in data:
+            raise serializers.ValidationError(
+                'Укажите либо жанр, либо категорию.'
+            )
+        return data
+
+
 class TokenSerializer(serializers.Serializer):
     username = serializers.CharField(required=True)
     confirmation_code = serializers.CharField(required=True)
 
 
 class CommentSerializer(serializers.ModelSerializer):
-    review = serializers.SlugRelatedField(slug_field='text', read_only=True)
+    review = serializers.PrimaryKeyRelatedField(read_only=True)
     author = serializers.SlugRelatedField(
         slug_field='username', read_only=True
     )
@@ -127,6 +208,14 @@ class CommentSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class CommentWithReviewTextSerializer(CommentSerializer):
+    """
+    Комментарий с полным текстом отзыва вместо его id.
+    Используется только по запросу `?expand=review`.
+    """
+    review = serializers.SlugRelatedField(slug_field='text', read_only=True)
+
+
 class ReviewSerializer(serializers.ModelSerializer):
     title = serializers.SlugRelatedField(
         slug_field='name',
@@ -138,16 +227,13 @@ class ReviewSerializer(serializers.ModelSerializer):
         read_only=True,
     )
 
-    def validate(self, data):
-        request = self.context['request']
-        author = request.user
-        title_id = self.context['view'].kwargs.get('title_id')
-        title = get_object_or_404(Title, pk=title_id)
-        if request.method == 'POST':
-            if Review.objects.filter(title=title, author=author).exists():
-                raise ValidationError('Нельзя добавить более одного отзыва')
-        return data
-
     class Meta:
         model = Review
         fields = '__all__'
+
+
+class ChangeLogSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = ChangeLog
+        fields = ('id', 'object_type', 'object_id', 'action', 'created')
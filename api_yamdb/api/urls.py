@@ -1,15 +1,16 @@
 from django.urls import include, path
 from rest_framework import routers
 
-from .views import (CategoryViewSet, CommentViewSet, GenreViewSet,
-                    ReviewViewSet, TitleViewSet, UserViewSet, get_token,
-                    sign_up)
+from .views import (CategoryViewSet, ChangeLogViewSet, CommentViewSet,
+                    GenreViewSet, ReviewViewSet, TitleViewSet, UserViewSet,
+                    autocomplete, export, get_token, metrics, sign_up)
 
 router = routers.DefaultRouter()
 router.register('titles', TitleViewSet)
 router.register('genres', GenreViewSet)
 router.register('categories', CategoryViewSet)
 router.register('users', UserViewSet)
+router.register('changes', ChangeLogViewSet)
 router.register(r'titles/(?P<title_id>\d+)/reviews',
                 ReviewViewSet, basename='reviews')
 router.register(r'titles/(?P<title_id>\d+)/reviews/(?P<review_id>\d+)'
@@ -19,4 +20,7 @@ urlpatterns = [
     path('v1/', include(router.urls)),
     path('v1/auth/signup/', sign_up, name='signup'),
     path('v1/auth/token/', get_token, name='token'),
+    path('v1/autocomplete/', autocomplete, name='autocomplete'),
+    path('v1/metrics/', metrics, name='metrics'),
+    path('v1/export/<str:sheet>/', export, name='export'),
 ]
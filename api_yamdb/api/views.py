@@ -1,53 +1,159 @@
+import re
+
 from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_vary_headers
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, status, viewsets, permissions
+from rest_framework import filters, mixins, status, viewsets, permissions
 from rest_framework.pagination import LimitOffsetPagination
-from rest_framework.exceptions import MethodNotAllowed
+from rest_framework.exceptions import (
+    MethodNotAllowed, NotFound, ValidationError,
+)
 from rest_framework.response import Response
 from rest_framework.decorators import action, api_view, permission_classes
-from rest_framework_simplejwt.tokens import AccessToken
 
-from reviews.models import Category, Genre, Review, Title
-from users.models import User
-from .filters import TitleFilter
+from reviews.changelog import record, record_deleted_reviews
+from reviews.export import (
+    CONTENT_TYPES, FORMATS, NDJSON, SHEETS, export_sheet, get_file_name,
+)
+from reviews.models import (
+    Category, ChangeLog, Comment, Genre, Review, Title,
+)
+from reviews.ratings import (
+    SCORE_COUNT_FIELDS, recalculate_title_ratings, update_title_rating,
+)
+from users.models import OutgoingEmail, User
+from .authentication import VersionedAccessToken
+from .autocomplete import SOURCES, prefix_index
+from .cache import CachedResponseMixin, InvalidateCacheMixin
+from .filters import PrefixSearchFilter, StableOrderingFilter, TitleFilter
+from .leaderboards import ALL, get_top, update_title_on_commit
+from .middleware import SerializeTimingMixin, route_stats
+from .pagination import (
+    ChangeFeedPagination, PubDatePagination, TitlePagination, UserPagination,
+)
 from .permissions import (
     IsAdminModeratorOwnerOrReadOnly,
     IsAdmin,
+    IsAdminOrPublicSheet,
     IsAdminOrReadOnly,
 )
 from .serializers import (
+    AutocompleteSerializer,
     CategorySerializer,
+    ChangeLogSerializer,
     GenreSerializer,
     TitleSerializer,
+    TitleDetailSerializer,
+    TitleDistributionSerializer,
     TitleGetSerializer,
+    TitleIdsSerializer,
     TokenSerializer,
+    TopTitlesSerializer,
     UserSerializer,
     ReviewSerializer,
     SignUpSerializer,
     CommentSerializer,
+    CommentWithReviewTextSerializer,
 )
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(SerializeTimingMixin, CachedResponseMixin,
+                   viewsets.ModelViewSet):
     queryset = (
-        Title.objects.all()
+        Title.objects.select_related('category').prefetch_related('genre')
     )
     permission_classes = (IsAdminOrReadOnly,)
-    pagination_class = LimitOffsetPagination
-    filter_backends = (DjangoFilterBackend,)
+    pagination_class = TitlePagination
+    filter_backends = (DjangoFilterBackend, StableOrderingFilter)
     filterset_class = TitleFilter
+    ordering_fields = ('rating', 'year', 'name')
+    ordering = ('year',)
+    cache_scopes = ('titles',)
+
+    def get_cache_scopes(self):
+        # Страница произведения зависит только от него самого и от
+        # названий жанров и категорий; списки — от всех произведений.
+        if self.action == 'retrieve':
+            return (f'titles:{self.kwargs["pk"]}', 'genres', 'categories')
+        return self.cache_scopes
+
+    def get_invalidated_scopes(self):
+        scopes = ['titles']
+        if 'pk' in self.kwargs:
+            scopes.append(f'titles:{self.kwargs["pk"]}')
+            scopes.append(f'reviews:{self.kwargs["pk"]}')
+        scopes.extend(
+            f'comments:{pk}' for pk in getattr(self, '_deleted_reviews', ())
+        )
+        return scopes
+
+    def perform_destroy(self, instance):
+        # Комментарии к отзывам произведения удаляются вместе с ним.
+        self._deleted_reviews = list(
+            instance.reviews.order_by('pk').values_list('pk', flat=True)
+        )
+        instance.delete()
 
     def get_serializer_class(self):
+        if self.action == 'retrieve':
+            return TitleDetailSerializer
         if self.request.method in permissions.SAFE_METHODS:
             return TitleGetSerializer
         return TitleSerializer
 
+    @action(detail=False, methods=('get',))
+    def distributions(self, request):
+        """
+        Гистограммы оценок, медианы и процентили нескольких произведений:
+        `?ids=1,2,3`. Отсутствующие произведения пропускаются.
+        Права доступа: Доступно без токена.
+        """
+        return self.get_cached_response(
+            self.get_distributions_response, request
+        )
+
+    def get_distributions_response(self, request):
+        serializer = TitleIdsSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        titles = Title.objects.only(*SCORE_COUNT_FIELDS).in_bulk(ids)
+        serializer = TitleDistributionSerializer(
+            [titles[pk] for pk in ids if pk in titles], many=True
+        )
+        return Response(serializer.data)
+
+    @action(detail=False, methods=('get',))
+    def top(self, request):
+        """
+        Лучшие произведения по взвешенному рейтингу: все, жанра (?genre=)
+        или категории (?category=). Списки заранее рассчитаны и
+        обновляются при изменении отзывов.
+        Права доступа: Доступно без токена.
+        """
+        return self.get_cached_response(self.get_top_response, request)
+
+    def get_top_response(self, request):
+        serializer = TopTitlesSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        kind = next(
+            (kind for kind in ('genre', 'category') if kind in data), ALL
+        )
+        ids = [pk for _, pk in get_top(kind, data.get(kind, ''),
+                                       data['limit'])]
+        titles = self.get_queryset().in_bulk(ids)
+        serializer = self.get_serializer(
+            [titles[pk] for pk in ids if pk in titles], many=True
+        )
+        return Response(serializer.data)
+
 
-class GenreViewSet(viewsets.ModelViewSet):
+class GenreViewSet(SerializeTimingMixin, CachedResponseMixin,
+                   viewsets.ModelViewSet):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     permission_classes = (IsAdminOrReadOnly,)
@@ -60,6 +166,8 @@ class GenreViewSet(viewsets.ModelViewSet):
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
     pagination_class = LimitOffsetPagination
+    cache_scopes = ('genres',)
+    invalidated_scopes = ('genres', 'titles')
 
     def get_object(self):
         if self.request.method == 'GET':
@@ -67,7 +175,8 @@ class GenreViewSet(viewsets.ModelViewSet):
         return super().get_object()
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(SerializeTimingMixin, CachedResponseMixin,
+                      viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = (IsAdminOrReadOnly,)
@@ -80,6 +189,8 @@ class CategoryViewSet(viewsets.ModelViewSet):
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
     pagination_class = LimitOffsetPagination
+    cache_scopes = ('categories',)
+    invalidated_scopes = ('categories', 'titles')
 
     def get_object(self):
         if self.request.method == 'GET':
@@ -87,16 +198,61 @@ class CategoryViewSet(viewsets.ModelViewSet):
         return super().get_object()
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(SerializeTimingMixin, InvalidateCacheMixin,
+                  viewsets.ModelViewSet):
     "Получить список всех пользователей. Права доступа: Администратор."
     queryset = User.objects.all()
     serializer_class = UserSerializer
     lookup_field = 'username'
-    filter_backends = (filters.SearchFilter,)
+    filter_backends = (PrefixSearchFilter,)
     search_fields = ('username',)
+    pagination_class = UserPagination
     permission_classes = [permissions.IsAuthenticated, IsAdmin]
     http_method_names = ('get', 'post', 'patch', 'delete')
 
+    def get_invalidated_scopes(self):
+        return getattr(self, '_author_scopes', ())
+
+    def get_author_scopes(self, user):
+        """Кэши ответов, в которых выводится имя пользователя."""
+        title_ids = set(user.reviews.values_list('title_id', flat=True))
+        review_ids = set(user.comments.values_list('review_id', flat=True))
+        return [
+            *(f'reviews:{pk}' for pk in sorted(title_ids)),
+            *(f'comments:{pk}' for pk in sorted(review_ids)),
+        ]
+
+    def save_user(self, serializer):
+        username = serializer.instance.username
+        user = serializer.save()
+        if user.username != username:
+            self._author_scopes = self.get_author_scopes(user)
+
+    def perform_update(self, serializer):
+        self.save_user(serializer)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        # Отзывы и комментарии пользователя удаляются каскадом, минуя
+        # ReviewViewSet: рейтинги их произведений пересчитываются здесь
+        # одним сгруппированным запросом.
+        reviews = list(instance.reviews.values_list('pk', 'title_id'))
+        review_ids = {pk for pk, _ in reviews}
+        review_ids.update(
+            instance.comments.values_list('review_id', flat=True)
+        )
+        title_ids = {title_id for _, title_id in reviews}
+        instance.delete()
+        recalculate_title_ratings(title_ids)
+        for title_id in title_ids:
+            update_title_on_commit(title_id)
+        self._author_scopes = [
+            *(['titles'] if title_ids else []),
+            *(f'titles:{title_id}' for title_id in sorted(title_ids)),
+            *(f'reviews:{title_id}' for title_id in sorted(title_ids)),
+            *(f'comments:{pk}' for pk in sorted(review_ids)),
+        ]
+
     @action(
         methods=['GET', 'PATCH'],
         detail=False,
@@ -104,13 +260,18 @@ class UserViewSet(viewsets.ModelViewSet):
         permission_classes=(permissions.IsAuthenticated,),
     )
     def get_update_me(self, request):
+        if request.method == 'GET':
+            serializer = self.get_serializer(request.user)
+            return Response(serializer.data, status=status.HTTP_200_OK)
+        # request.user может быть копией из кэша процесса: сохранение
+        # её целиком вернуло бы в базу устаревшие права доступа.
         serializer = self.get_serializer(
-            request.user, data=request.data, partial=True
+            User.objects.get(pk=request.user.pk), data=request.data,
+            partial=True,
         )
         if serializer.is_valid():
-            if self.request.method == 'PATCH':
-                serializer.validated_data.pop('role', None)
-            serializer.save()
+            serializer.validated_data.pop('role', None)
+            self.save_user(serializer)
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -121,6 +282,7 @@ def sign_up(request):
     """
     Регистрация нового пользователя.
     Получить код подтверждения на переданный email.
+    Письмо ставится в очередь и отправляется командой send_emails.
     Права доступа: Доступно без токена.
     """
     serializer = SignUpSerializer(data=request.data)
@@ -136,12 +298,11 @@ def sign_up(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         confirmation_code = default_token_generator.make_token(user)
-        send_mail(
-            'Подтверждение регистрации api_yamdb.',
-            f'Код подтверждения: {confirmation_code}',
-            settings.REGISTRATION_FROM_EMAIL,
-            [user.email],
-            fail_silently=True,
+        OutgoingEmail.objects.create(
+            subject='Подтверждение регистрации api_yamdb.',
+            body=f'Код подтверждения: {confirmation_code}',
+            from_email=settings.REGISTRATION_FROM_EMAIL,
+            to=user.email,
         )
         return Response(serializer.data, status=status.HTTP_200_OK)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -162,36 +323,193 @@ def get_token(request):
     if default_token_generator.check_token(
         user, serializer.validated_data["confirmation_code"]
     ):
-        token = AccessToken.for_user(user)
+        token = VersionedAccessToken.for_user(user)
         return Response({'token': str(token)}, status=status.HTTP_200_OK)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def autocomplete(request):
+    """
+    Подсказки по началу названий произведений, жанров и категорий.
+    Ищутся в индексе в памяти процесса, без запросов к базе.
+    Права доступа: Доступно без токена.
+    """
+    serializer = AutocompleteSerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    data = serializer.validated_data
+    suggestions = prefix_index.search(
+        data['q'], data['limit'], data.get('type') or SOURCES
+    )
+    return Response(suggestions, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def metrics(request):
+    """
+    Время обработки (p50/p95/p99), среднее число SQL-запросов и время
+    в базе по маршрутам API за последние запросы этого процесса.
+    Права доступа: Администратор.
+    """
+    return Response(route_stats.summary(), status=status.HTTP_200_OK)
+
+
+ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminOrPublicSheet])
+def export(request, sheet):
+    """
+    Потоковая выгрузка таблицы каталога целиком, по возрастанию id.
+    Формат задаётся параметром `output`: ndjson (по умолчанию) или csv
+    в виде, который загружает команда csv_fill. Ответ сжимается
+    на лету, если клиент принимает gzip.
+    Права доступа: Доступно без токена, таблица users — Администратор.
+    """
+    if sheet not in SHEETS:
+        raise NotFound(f'Таблица {sheet} не найдена.')
+    file_format = request.query_params.get('output', NDJSON)
+    if file_format not in FORMATS:
+        raise ValidationError(
+            {'output': f'Допустимые форматы: {", ".join(FORMATS)}.'}
+        )
+    compress = bool(
+        ACCEPTS_GZIP.search(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    )
+    response = StreamingHttpResponse(
+        export_sheet(sheet, file_format, compress),
+        content_type=CONTENT_TYPES[file_format],
+    )
+    if compress:
+        response['Content-Encoding'] = 'gzip'
+    response['Content-Disposition'] = (
+        f'attachment; filename="{get_file_name(sheet, file_format)}"'
+    )
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+class ReviewViewSet(SerializeTimingMixin, CachedResponseMixin,
+                    viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
     permission_classes = [IsAdminModeratorOwnerOrReadOnly]
+    pagination_class = PubDatePagination
+
+    def get_title(self):
+        """Произведение из URL, загружается один раз за запрос."""
+        if not hasattr(self, '_title'):
+            self._title = get_object_or_404(
+                Title, pk=self.kwargs.get('title_id')
+            )
+        return self._title
 
     def get_queryset(self):
-        title = get_object_or_404(Title, pk=self.kwargs.get("title_id"))
+        return self.get_title().reviews.select_related('author', 'title')
 
-        return title.reviews.all()
+    def get_cache_scopes(self):
+        return (f'reviews:{self.kwargs["title_id"]}',)
+
+    def get_invalidated_scopes(self):
+        # Отзывы меняют рейтинг произведения: его страницу и списки.
+        title_id = self.kwargs['title_id']
+        scopes = [f'reviews:{title_id}', f'titles:{title_id}', 'titles']
+        if 'pk' in self.kwargs:
+            scopes.append(f'comments:{self.kwargs["pk"]}')
+        return scopes
 
     def perform_create(self, serializer):
-        title_id = self.kwargs.get('title_id')
-        title = get_object_or_404(Title, id=title_id)
-        serializer.save(author=self.request.user, title=title)
+        title = self.get_title()
+        try:
+            with transaction.atomic():
+                review = serializer.save(
+                    author=self.request.user, title=title
+                )
+                update_title_rating(title.pk, added_score=review.score)
+                update_title_on_commit(title.pk)
+        except IntegrityError:
+            raise ValidationError('Нельзя добавить более одного отзыва')
 
+    @transaction.atomic
+    def perform_update(self, serializer):
+        old_score = serializer.instance.score
+        review = serializer.save()
+        update_title_rating(
+            review.title_id, added_score=review.score, removed_score=old_score
+        )
+        update_title_on_commit(review.title_id)
 
-class CommentViewSet(viewsets.ModelViewSet):
-    serializer_class = CommentSerializer
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        record_deleted_reviews(
+            Review.objects.filter(pk=instance.pk), instance.comments.all()
+        )
+        instance.delete()
+        update_title_rating(instance.title_id, removed_score=instance.score)
+        update_title_on_commit(instance.title_id)
+
+
+class CommentViewSet(SerializeTimingMixin, CachedResponseMixin,
+                     viewsets.ModelViewSet):
     permission_classes = [IsAdminModeratorOwnerOrReadOnly]
+    pagination_class = PubDatePagination
+    expand_query_param = 'expand'
+
+    def get_serializer_class(self):
+        expand = self.request.query_params.get(self.expand_query_param, '')
+        if 'review' in expand.split(','):
+            return CommentWithReviewTextSerializer
+        return CommentSerializer
+
+    def get_review(self):
+        """Отзыв из URL, загружается один раз за запрос."""
+        if not hasattr(self, '_review'):
+            self._review = get_object_or_404(
+                Review,
+                pk=self.kwargs.get('review_id'),
+                title=self.kwargs.get('title_id'),
+            )
+        return self._review
 
     def get_queryset(self):
-        review = get_object_or_404(Review, pk=self.kwargs.get("review_id"))
-        return review.comments.all()
+        # Комментарии получают уже загруженный отзыв без отдельных запросов.
+        return self.get_review().comments.select_related('author')
+
+    def get_cache_scopes(self):
+        return (f'comments:{self.kwargs["review_id"]}',)
+
+    def get_invalidated_scopes(self):
+        return (f'comments:{self.kwargs["review_id"]}',)
 
     def perform_create(self, serializer):
-        title_id = self.kwargs.get('title_id')
-        review_id = self.kwargs.get('review_id')
-        review = get_object_or_404(Review, id=review_id, title=title_id)
-        serializer.save(author=self.request.user, review=review)
+        serializer.save(author=self.request.user, review=self.get_review())
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        record(Comment, [instance.pk], ChangeLog.DELETE)
+        instance.delete()
+
+
+class ChangeLogViewSet(SerializeTimingMixin, mixins.ListModelMixin,
+                       viewsets.GenericViewSet):
+    """
+    Журнал создания, изменения и удаления произведений, жанров, категорий,
+    отзывов и комментариев. Курсор `?since=` из ссылки `next` возвращает
+    только изменения после уже полученных; `?type=title,genre` оставляет
+    изменения указанных типов объектов.
+    Права доступа: Доступно без токена.
+    """
+    queryset = ChangeLog.objects.all()
+    serializer_class = ChangeLogSerializer
+    pagination_class = ChangeFeedPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        object_types = self.request.query_params.get('type')
+        if object_types:
+            queryset = queryset.filter(
+                object_type__in=object_types.split(',')
+            )
+        return queryset
@@ -32,6 +32,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.QueryMetricsMiddleware',
+    'api.nplusone.NPlusOneMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -117,7 +119,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS':
         'rest_framework.pagination.PageNumberPagination',
@@ -129,6 +131,41 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Кэш ответов API на безопасные запросы.
+API_CACHE_ALIAS = 'default'
+API_CACHE_TIMEOUT = 300
+
+# Кэш пользователей для аутентификации по JWT (на процесс).
+USER_CACHE_SIZE = 1024
+USER_CACHE_TIMEOUT = 60
+
+# Взвешенный (байесовский) рейтинг: средняя оценка произведения
+# сглаживается к RATING_PRIOR_MEAN с весом RATING_PRIOR_WEIGHT отзывов.
+RATING_PRIOR_MEAN = 5.5
+RATING_PRIOR_WEIGHT = 5
+
+# Лучшие произведения по взвешенному рейтингу: длина списков
+# и время их хранения в кэше API.
+LEADERBOARD_SIZE = 20
+LEADERBOARD_TIMEOUT = 60 * 60
+
+# Заголовки Server-Timing и X-DB-Queries и статистика по маршрутам
+# за последние API_METRICS_WINDOW запросов каждого.
+API_METRICS_ENABLED = True
+API_METRICS_WINDOW = 1000
+
+# Обнаружение N+1: однотипный SQL-запрос, выполненный за один запрос
+# к API больше NPLUSONE_THRESHOLD раз, даёт предупреждение или ошибку.
+NPLUSONE_ENABLED = DEBUG
+NPLUSONE_THRESHOLD = 5
+NPLUSONE_RAISE = False
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 REGISTRATION_FROM_EMAIL = f'from@{DOMAIN_NAME}'
@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ReviewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reviews'
+
+    def ready(self):
+        from . import changelog  # noqa: F401
+        from .search import install_search_index_after_migrate
+        post_migrate.connect(install_search_index_after_migrate, sender=self)
@@ -0,0 +1,128 @@
+"""Запись изменений каталога в журнал ChangeLog."""
+
+from django.db.models import Q
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_delete,
+)
+from django.dispatch import receiver
+
+from users.models import User
+from .models import ChangeLog, Category, Comment, Genre, Review, Title
+
+
+def get_object_type(model):
+    return model._meta.model_name
+
+
+def get_entries(model, object_ids, action):
+    object_type = get_object_type(model)
+    return [
+        ChangeLog(object_type=object_type, object_id=pk, action=action)
+        for pk in object_ids
+    ]
+
+
+def save_entries(entries):
+    """
+    Добавляет события в журнал одним запросом в транзакции самого
+    изменения, если она открыта.
+    """
+    if len(entries) == 1:
+        # bulk_create вне транзакции открыл бы свою ради одной строки.
+        entries[0].save(force_insert=True)
+    else:
+        ChangeLog.objects.bulk_create(entries)
+
+
+def record(model, object_ids, action):
+    """Добавляет в журнал по событию на каждый id одним запросом."""
+    save_entries(get_entries(model, object_ids, action))
+
+
+def record_deleted_reviews(reviews, comments):
+    """
+    Отмечает удаление отзывов и комментариев одним запросом.
+    Обработчиков post_delete у Review и Comment нет: с ними Django
+    при каскадном удалении загружал бы и удалял комментарии по одному
+    и писал бы в журнал по запросу на объект. Поэтому каскадные удаления
+    записываются заранее из pre_delete произведения и пользователя,
+    а прямые — представлениями отзывов и комментариев.
+    """
+    save_entries([
+        *get_entries(
+            Review, reviews.order_by('pk').values_list('pk', flat=True),
+            ChangeLog.DELETE,
+        ),
+        *get_entries(
+            Comment, comments.order_by('pk').values_list('pk', flat=True),
+            ChangeLog.DELETE,
+        ),
+    ])
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Review)
+@receiver(post_save, sender=Comment)
+def record_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    record(sender, [instance.pk],
+           ChangeLog.CREATE if created else ChangeLog.UPDATE)
+
+
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Category)
+def record_deleted(sender, instance, **kwargs):
+    record(sender, [instance.pk], ChangeLog.DELETE)
+
+
+@receiver(pre_delete, sender=Title)
+def record_title_cascade(sender, instance, **kwargs):
+    record_deleted_reviews(
+        instance.reviews.all(),
+        Comment.objects.filter(review__title=instance),
+    )
+
+
+@receiver(pre_delete, sender=User)
+def record_author_cascade(sender, instance, **kwargs):
+    record_deleted_reviews(
+        instance.reviews.all(),
+        Comment.objects.filter(
+            Q(author=instance) | Q(review__author=instance)
+        ),
+    )
+
+
+@receiver(pre_delete, sender=Genre)
+@receiver(pre_delete, sender=Category)
+def record_titles_detached(sender, instance, **kwargs):
+    """
+    Удаление категории обнуляет её у произведений запросом UPDATE,
+    удаление жанра — строки связи без m2m_changed: сигналов
+    об изменении произведений нет, поэтому они отмечаются заранее.
+    """
+    record(
+        Title, instance.titles.order_by('pk').values_list('pk', flat=True),
+        ChangeLog.UPDATE,
+    )
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def record_title_genres(sender, instance, action, reverse, pk_set,
+                        **kwargs):
+    """Смена жанров — изменение произведения."""
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            record(Title, [instance.pk], ChangeLog.UPDATE)
+    elif action in ('post_add', 'post_remove') and pk_set:
+        record(Title, sorted(pk_set), ChangeLog.UPDATE)
+    elif action == 'pre_clear':
+        record(
+            Title, instance.titles.order_by('pk').values_list(
+                'pk', flat=True
+            ), ChangeLog.UPDATE,
+        )
@@ -1,32 +1,140 @@
 """Заполняет базу данных информацией из таблиц."""
 
 from csv import DictReader
+from itertools import islice
+from pathlib import Path
+from time import perf_counter
+
 from django.core.management import BaseCommand
 from django.conf import settings
+from django.db import transaction
 
 from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.ratings import recalculate_title_ratings
 
 FILE_DIR = settings.STATICFILES_DIRS[0] / 'data'
+# Порядок важен: таблицы загружаются раньше тех, что на них ссылаются.
 FILE_TO_MODEL = {
     'users.csv': User,
     'category.csv': Category,
-    'comments.csv': Comment,
     'genre.csv': Genre,
-    'review.csv': Review,
     'titles.csv': Title,
     'genre_title.csv': Title.genre.through,
+    'review.csv': Review,
+    'comments.csv': Comment,
 }
+RENAMED_COLUMNS = ('category', 'author')
+CHUNK_SIZE = 1000
+
+
+def read_chunks(reader, chunk_size):
+    while True:
+        chunk = list(islice(reader, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def prepare_row(model, row):
+    for key in RENAMED_COLUMNS:
+        if key in row:
+            row[f'{key}_id'] = row.pop(key)
+    for key, value in row.items():
+        if value == '' and model._meta.get_field(key).null:
+            row[key] = None
+    return row
+
+
+def upsert_chunk(model, rows):
+    """
+    Добавляет новые записи и обновляет существующие (по id)
+    тремя запросами на весь пакет.
+    """
+    objs = [model(**prepare_row(model, row)) for row in rows]
+    for obj in objs:
+        obj.pk = model._meta.pk.to_python(obj.pk)
+    existing = set(
+        model.objects.filter(pk__in=[obj.pk for obj in objs])
+        .values_list('pk', flat=True)
+    )
+    created = [obj for obj in objs if obj.pk not in existing]
+    # auto_now_add подменяет даты из таблицы текущим временем при
+    # вставке, поэтому они восстанавливаются отдельным обновлением.
+    auto_now_fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False) and field.attname in rows[0]
+    ]
+    dates = [
+        [getattr(obj, field.attname) for field in auto_now_fields]
+        for obj in created
+    ]
+    model.objects.bulk_create(created)
+    if auto_now_fields and created:
+        for obj, values in zip(created, dates):
+            for field, value in zip(auto_now_fields, values):
+                setattr(obj, field.attname, value)
+        model.objects.bulk_update(
+            created, [field.name for field in auto_now_fields]
+        )
+    update_fields = [
+        field.name for field in model._meta.concrete_fields
+        if not field.primary_key and field.attname in rows[0]
+    ]
+    if update_fields:
+        model.objects.bulk_update(
+            [obj for obj in objs if obj.pk in existing], update_fields
+        )
 
 
-# Too much nesting for my taste, but it's no CPU handler
 class Command(BaseCommand):
+    help = 'Загружает данные из csv-таблиц пакетами.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', type=Path, default=FILE_DIR,
+            help='Каталог с csv-таблицами.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE,
+            help='Количество строк в одной транзакции.',
+        )
+
     def handle(self, *args, **options):
         for sheet_name, model in FILE_TO_MODEL.items():
-            with open(FILE_DIR / sheet_name, encoding='utf-8') as data_sheet:
-                reader = DictReader(data_sheet)
-                for data in reader:
-                    for key in ('category', 'author'):
-                        if key in data:
-                            data[f'{key}_id'] = data.pop(key)
-                    model.objects.update_or_create(**data)
+            path = options['path'] / sheet_name
+            if not path.exists():
+                self.stdout.write(f'{sheet_name}: skipped, file not found.')
+                continue
+            self.load_sheet(path, model, options['chunk_size'])
+        self.recalculate_ratings(options['chunk_size'])
         self.stdout.write('The data from sheets imported.')
+
+    def load_sheet(self, path, model, chunk_size):
+        started = perf_counter()
+        total = 0
+        with open(path, encoding='utf-8', newline='') as data_sheet:
+            reader = DictReader(data_sheet)
+            for rows in read_chunks(reader, chunk_size):
+                with transaction.atomic():
+                    upsert_chunk(model, rows)
+                total += len(rows)
+        elapsed = perf_counter() - started
+        self.stdout.write(
+            f'{path.name}: {total} rows in {elapsed:.2f} s '
+            f'({total / elapsed if elapsed else 0:.0f} rows/s).'
+        )
+
+    def recalculate_ratings(self, chunk_size):
+        updated = 0
+        last_id = 0
+        while True:
+            chunk = list(
+                Title.objects.filter(pk__gt=last_id).order_by('pk')
+                .values_list('pk', flat=True)[:chunk_size]
+            )
+            if not chunk:
+                break
+            with transaction.atomic():
+                updated += len(recalculate_title_ratings(chunk))
+            last_id = chunk[-1]
+        self.stdout.write(f'Ratings recalculated for {updated} titles.')
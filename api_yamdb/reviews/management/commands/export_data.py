@@ -0,0 +1,64 @@
+"""Выгружает каталог в файлы NDJSON или CSV."""
+
+from pathlib import Path
+from time import perf_counter
+
+from django.core.management import BaseCommand, CommandError
+
+from reviews.export import (
+    CHUNK_SIZE, CSV, FORMATS, NDJSON, SHEETS, export_sheet, get_file_name,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково выгружает таблицы каталога в файлы. Выгрузка в csv '
+        'загружается обратно командой csv_fill.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'sheets', nargs='*',
+            help=f'Таблицы для выгрузки, по умолчанию все: '
+                 f'{", ".join(SHEETS)}.',
+        )
+        parser.add_argument(
+            '--path', type=Path, default=Path('.'),
+            help='Каталог для файлов выгрузки.',
+        )
+        parser.add_argument('--format', choices=FORMATS, default=NDJSON)
+        parser.add_argument(
+            '--gzip', action='store_true', help='Сжимать файлы в gzip.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE,
+            help='Количество строк, читаемых из базы за раз.',
+        )
+
+    def handle(self, *args, **options):
+        sheets = options.pop('sheets') or list(SHEETS)
+        unknown = set(sheets) - set(SHEETS)
+        if unknown:
+            raise CommandError(f'Unknown sheets: {", ".join(unknown)}.')
+        options['path'].mkdir(parents=True, exist_ok=True)
+        for sheet in sheets:
+            self.export(sheet, **options)
+        if options['format'] == CSV and not options['gzip']:
+            self.stdout.write(
+                f'Load it back with: manage.py csv_fill --path '
+                f'{options["path"]}'
+            )
+
+    def export(self, sheet, path, format, gzip, chunk_size, **options):
+        started = perf_counter()
+        file_path = path / get_file_name(sheet, format, gzip)
+        size = 0
+        with open(file_path, 'wb') as output:
+            for block in export_sheet(sheet, format, gzip, chunk_size):
+                output.write(block)
+                size += len(block)
+        elapsed = perf_counter() - started
+        self.stdout.write(
+            f'{file_path.name}: {size / 2 ** 20:.2f} MiB in {elapsed:.2f} s '
+            f'({size / 2 ** 20 / elapsed if elapsed else 0:.1f} MiB/s).'
+        )
@@ -0,0 +1,285 @@
+"""Заполняет базу данных синтетическим каталогом большого объёма."""
+
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate, islice
+from time import perf_counter
+
+from django.core.management import BaseCommand
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.db.models.fields import AutoFieldMixin
+from django.utils import timezone
+
+from reviews.models import (
+    MAX_SCORE, MIN_SCORE, SCORES, Category, Comment, Genre, Review, Title,
+    User, score_count_field,
+)
+from reviews.ratings import get_rating, get_weighted_rating
+
+BATCH_SIZE = 5000
+# За сколько дней до запуска распределены даты публикации.
+HISTORY_DAYS = 5 * 365
+# Даты публикации выбираются из заранее подготовленного набора:
+# преобразование даты для базы на каждой строке обходится дороже вставки.
+DATES_POOL_SIZE = 2 ** 16
+# Кеш страниц SQLite на время генерации, КиБ: индексы больших таблиц
+# перестают вытесняться на диск при каждой пачке вставок.
+SQLITE_CACHE_SIZE = 256 * 1024
+
+
+def zipf_weights(count, exponent):
+    """Веса закона Ципфа: доля объекта ранга r пропорциональна 1 / r^s."""
+    return [1 / rank ** exponent for rank in range(1, count + 1)]
+
+
+def distribute(total, count, exponent, rng, limit=None):
+    """
+    Раскладывает total штук по count объектам по закону Ципфа
+    со случайным порядком рангов. Не больше limit на объект:
+    излишек достаётся остальным объектам с теми же весами.
+    """
+    if not count:
+        return []
+    weights = zipf_weights(count, exponent)
+    rng.shuffle(weights)
+    if limit is not None:
+        total = min(total, count * limit)
+    scale = total / sum(weights)
+    counts = [int(weight * scale) for weight in weights]
+    if limit is not None:
+        counts = [min(value, limit) for value in counts]
+    cumulative = list(accumulate(weights))
+    remainder = total - sum(counts)
+    while remainder > 0:
+        for idx in rng.choices(range(count), cum_weights=cumulative,
+                               k=remainder):
+            if limit is None or counts[idx] < limit:
+                counts[idx] += 1
+                remainder -= 1
+    return counts
+
+
+def insert_rows(model, columns, rows, batch_size):
+    """
+    Вставляет строки пакетами через executemany, минуя создание
+    экземпляров моделей. Остальные столбцы, кроме автоинкрементных,
+    получают значения по умолчанию полей модели.
+    Возвращает количество строк.
+    """
+    defaults = [
+        field for field in model._meta.concrete_fields
+        if field.column not in columns
+        and field is not model._meta.pk
+        and not isinstance(field, AutoFieldMixin)
+    ]
+    default_values = tuple(
+        field.get_db_prep_save(field.get_default(), connection)
+        for field in defaults
+    )
+    names = [*columns, *(field.column for field in defaults)]
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        connection.ops.quote_name(model._meta.db_table),
+        ', '.join(connection.ops.quote_name(name) for name in names),
+        ', '.join(['%s'] * len(names)),
+    )
+    rows = iter(rows)
+    total = 0
+    with connection.cursor() as cursor:
+        while True:
+            batch = [
+                (*row, *default_values) for row in islice(rows, batch_size)
+            ]
+            if not batch:
+                return total
+            cursor.executemany(sql, batch)
+            total += len(batch)
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует пользователей, произведения, жанры, категории, отзывы '
+        'и комментарии с распределением по закону Ципфа.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--titles', type=int, default=50000)
+        parser.add_argument('--genres', type=int, default=30)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--reviews', type=int, default=1000000)
+        parser.add_argument('--comments', type=int, default=1000000)
+        parser.add_argument(
+            '--zipf', type=float, default=1.1,
+            help='Показатель закона Ципфа для отзывов и комментариев.',
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Начальное значение генератора случайных чисел.',
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.dates = self.get_dates()
+        started = perf_counter()
+        with transaction.atomic(), self.sqlite_cache():
+            users = self.generate_users(options['users'])
+            genres = self.generate_named(Genre, 'genre', options['genres'])
+            categories = self.generate_named(
+                Category, 'category', options['categories']
+            )
+            titles = self.generate_titles(
+                options, users, genres, categories
+            )
+            reviews = self.generate_reviews(titles, users)
+            self.generate_comments(options, reviews, users)
+            self.reset_sequences()
+        self.stdout.write(
+            f'Data generated in {perf_counter() - started:.2f} s.'
+        )
+
+    @contextmanager
+    def sqlite_cache(self):
+        if connection.vendor != 'sqlite':
+            yield
+            return
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA cache_size')
+            cache_size, = cursor.fetchone()
+            cursor.execute(f'PRAGMA cache_size = -{SQLITE_CACHE_SIZE}')
+            try:
+                yield
+            finally:
+                cursor.execute(f'PRAGMA cache_size = {cache_size}')
+
+    def next_id(self, model):
+        return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+    def get_dates(self):
+        now = timezone.now()
+        adapt = connection.ops.adapt_datetimefield_value
+        return [
+            adapt(now - timedelta(days=self.rng.random() * HISTORY_DAYS))
+            for _ in range(DATES_POOL_SIZE)
+        ]
+
+    def insert(self, model, columns, rows):
+        started = perf_counter()
+        total = insert_rows(model, columns, rows, self.batch_size)
+        elapsed = perf_counter() - started
+        self.stdout.write(
+            f'{model._meta.db_table}: {total} rows in {elapsed:.2f} s '
+            f'({total / elapsed if elapsed else 0:.0f} rows/s).'
+        )
+
+    def generate_users(self, count):
+        first = self.next_id(User)
+        ids = range(first, first + count)
+        self.insert(User, ('id', 'username', 'email', 'password'), (
+            (pk, f'generated{pk}', f'generated{pk}@yamdb.fake', '!')
+            for pk in ids
+        ))
+        return ids
+
+    def generate_named(self, model, prefix, count):
+        first = self.next_id(model)
+        ids = range(first, first + count)
+        self.insert(model, ('id', 'name', 'slug'), (
+            (pk, f'Generated {prefix} {pk}', f'generated-{prefix}-{pk}')
+            for pk in ids
+        ))
+        return ids
+
+    def generate_titles(self, options, users, genres, categories):
+        """
+        Заранее раскладывает отзывы по произведениям и оценки внутри
+        произведения, чтобы сразу записать рейтинги и гистограммы.
+        Возвращает {id: список оценок}.
+        """
+        rng = self.rng
+        first = self.next_id(Title)
+        ids = range(first, first + options['titles'])
+        counts = distribute(
+            options['reviews'], len(ids), options['zipf'], rng,
+            limit=len(users),
+        )
+        genre_weights = list(accumulate(zipf_weights(len(genres), 1)))
+        category_weights = list(accumulate(zipf_weights(len(categories), 1)))
+        titles = {}
+        rows = []
+        links = []
+        for pk, count in zip(ids, counts):
+            quality = rng.uniform(MIN_SCORE + 2, MAX_SCORE - 1)
+            scores = [
+                min(max(round(rng.gauss(quality, 1.5)), MIN_SCORE),
+                    MAX_SCORE)
+                for _ in range(count)
+            ]
+            titles[pk] = scores
+            score_sum = sum(scores)
+            category, = rng.choices(categories, cum_weights=category_weights)
+            rows.append((
+                pk, f'Generated title {pk}', rng.randint(1900, 2023),
+                f'Description of generated title {pk}', category,
+                score_sum, count, get_rating(score_sum, count),
+                get_weighted_rating(score_sum, count),
+                *(scores.count(score) for score in SCORES),
+            ))
+            for genre in set(rng.choices(
+                genres, cum_weights=genre_weights, k=rng.randint(1, 3)
+            )):
+                links.append((pk, genre))
+        self.insert(Title, (
+            'id', 'name', 'year', 'description', 'category_id', 'score_sum',
+            'reviews_count', 'rating', 'weighted_rating',
+            *(score_count_field(score) for score in SCORES),
+        ), rows)
+        self.insert(Title.genre.through, ('title_id', 'genre_id'), links)
+        return titles
+
+    def generate_reviews(self, titles, users):
+        """Авторы отзывов на одно произведение не повторяются."""
+        first = self.next_id(Review)
+        last = first
+        sample, date = self.rng.sample, self.rng.choice
+
+        def rows():
+            nonlocal last
+            for title_id, scores in titles.items():
+                authors = sample(users, len(scores))
+                for author, score in zip(authors, scores):
+                    yield (last, title_id, author, score,
+                           f'Review {last}', date(self.dates))
+                    last += 1
+
+        self.insert(Review, (
+            'id', 'title_id', 'author_id', 'score', 'text', 'pub_date'
+        ), rows())
+        return range(first, last)
+
+    def generate_comments(self, options, reviews, users):
+        if not reviews:
+            return
+        counts = distribute(
+            options['comments'], len(reviews), options['zipf'], self.rng
+        )
+        choice = self.rng.choice
+        self.insert(Comment, (
+            'review_id', 'author_id', 'text', 'pub_date'
+        ), (
+            (review, choice(users), 'Comment', choice(self.dates))
+            for review, count in zip(reviews, counts)
+            for _ in range(count)
+        ))
+
+    def reset_sequences(self):
+        """Явно заданные id не сдвигают последовательности PostgreSQL."""
+        models = (User, Genre, Category, Title, Review, Comment)
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
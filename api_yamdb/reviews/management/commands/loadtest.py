@@ -0,0 +1,418 @@
+"""Нагрузочный прогон смеси запросов к API в пуле потоков."""
+
+import json
+import random
+import subprocess
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from http.client import HTTPConnection
+from itertools import islice
+from pathlib import Path
+from socketserver import ThreadingMixIn
+from time import perf_counter
+from urllib.parse import urlsplit
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core.management import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.test import Client
+
+from api.authentication import VersionedAccessToken
+from api.middleware import get_percentile
+from reviews.models import Review, Title
+from users.models import User
+
+API = '/api/v1'
+# Сколько объектов каждого вида выбирается из базы для построения запросов.
+SAMPLE_SIZE = 1000
+DEFAULT_MIX = {
+    'titles-list': 25,
+    'titles-detail': 20,
+    'reviews-list': 15,
+    'comments-list': 10,
+    'auth-token': 5,
+    'reviews-update': 10,
+    'comments-create': 15,
+}
+
+
+def title_list(data, rng):
+    return 'get', f'{API}/titles/', None, None
+
+
+def title_detail(data, rng):
+    title = rng.choice(data['titles'])
+    return 'get', f'{API}/titles/{title}/', None, None
+
+
+def review_list(data, rng):
+    title = rng.choice(data['titles'])
+    return 'get', f'{API}/titles/{title}/reviews/', None, None
+
+
+def comment_list(data, rng):
+    review, title, _ = rng.choice(data['reviews'])
+    return (
+        'get', f'{API}/titles/{title}/reviews/{review}/comments/', None, None
+    )
+
+
+def auth_token(data, rng):
+    username, code = rng.choice(data['codes'])
+    return 'post', f'{API}/auth/token/', {
+        'username': username, 'confirmation_code': code,
+    }, None
+
+
+def review_update(data, rng):
+    review, title, author = rng.choice(data['reviews'])
+    return 'patch', f'{API}/titles/{title}/reviews/{review}/', {
+        'text': f'Обновлённый отзыв {rng.random()}',
+    }, data['tokens'][author]
+
+
+def comment_create(data, rng):
+    review, title, _ = rng.choice(data['reviews'])
+    return 'post', f'{API}/titles/{title}/reviews/{review}/comments/', {
+        'text': 'Комментарий нагрузочного теста',
+    }, data['tokens'][rng.choice(data['users'])]
+
+
+SCENARIOS = {
+    'titles-list': title_list,
+    'titles-detail': title_detail,
+    'reviews-list': review_list,
+    'comments-list': comment_list,
+    'auth-token': auth_token,
+    'reviews-update': review_update,
+    'comments-create': comment_create,
+}
+
+
+def parse_mix(value):
+    """Смесь запросов вида `titles-list=30,auth-token=5`."""
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise CommandError(
+                f'Unknown endpoint {name!r}, expected one of: '
+                f'{", ".join(SCENARIOS)}.'
+            )
+        try:
+            mix[name] = float(weight or 1)
+        except ValueError:
+            raise CommandError(f'Invalid weight for {name!r}: {weight!r}.')
+    return mix
+
+
+def get_test_data(sample_size):
+    """Идентификаторы, коды подтверждения и токены для построения запросов."""
+    titles = list(
+        Title.objects.order_by('-reviews_count', 'pk')
+        .values_list('pk', flat=True)[:sample_size]
+    )
+    if not titles:
+        raise CommandError('No titles found, run generate_data first.')
+    reviews = list(
+        Review.objects.filter(title__in=titles).order_by('-pk')
+        .values_list('pk', 'title_id', 'author_id')[:sample_size]
+    )
+    if not reviews:
+        raise CommandError('No reviews found, run generate_data first.')
+    users = list(User.objects.filter(
+        pk__in={author for _, _, author in reviews}
+    ))
+    return {
+        'titles': titles,
+        'reviews': reviews,
+        'users': [user.pk for user in users],
+        'codes': [
+            (user.username, default_token_generator.make_token(user))
+            for user in users
+        ],
+        'tokens': {
+            user.pk: str(VersionedAccessToken.for_user(user)) for user in users
+        },
+    }
+
+
+def get_commit():
+    try:
+        return subprocess.run(
+            ('git', 'rev-parse', '--short', 'HEAD'), cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class ClientTransport:
+    """Запросы через тестовый клиент Django в процессе, клиент на поток."""
+    def __init__(self):
+        self._local = threading.local()
+
+    def request(self, method, path, data, token):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = Client()
+        extra = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        if data is not None:
+            extra.update(
+                data=json.dumps(data), content_type='application/json'
+            )
+        response = getattr(client, method)(path, **extra)
+        return response.status_code, response.get('X-DB-Queries')
+
+    def close(self):
+        connection.close()
+
+
+class HTTPTransport:
+    """Запросы по HTTP к запущенному серверу, соединение на поток."""
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self._local = threading.local()
+
+    def request(self, method, path, data, token):
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        body = json.dumps(data) if data is not None else None
+        for attempt in range(2):
+            conn = getattr(self._local, 'conn', None)
+            if conn is None:
+                conn = self._local.conn = HTTPConnection(
+                    self.host, self.port
+                )
+            try:
+                conn.request(method.upper(), path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+            except (ConnectionError, OSError):
+                # Сервер без keep-alive закрывает соединение после ответа.
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+                continue
+            if response.will_close:
+                conn.close()
+                self._local.conn = None
+            return response.status, response.getheader('X-DB-Queries')
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def summarize(samples, elapsed):
+    """Сводка по выборке; пустая выборка даёт нулевые показатели."""
+    latencies = sorted(latency for _, latency, _ in samples)
+    queries = [count for _, _, count in samples if count is not None]
+    if not latencies:
+        latencies = [0.0]
+    return {
+        'requests': len(samples),
+        'errors': sum(status >= 400 for status, _, _ in samples),
+        'rps': len(samples) / elapsed if elapsed else 0.0,
+        'p50_ms': get_percentile(latencies, 50) * 1000,
+        'p95_ms': get_percentile(latencies, 95) * 1000,
+        'p99_ms': get_percentile(latencies, 99) * 1000,
+        'max_ms': latencies[-1] * 1000,
+        'mean_queries': sum(queries) / len(queries) if queries else None,
+    }
+
+
+def get_change(current, previous):
+    """Относительное изменение или `n/a`, если прошлое значение нулевое."""
+    if not previous:
+        return 'n/a'
+    return f'{current / previous - 1:+.1%}'
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет смесь запросов к API в пуле потоков и сообщает '
+        'пропускную способность, процентили задержки и число SQL-запросов '
+        'по каждому виду запросов. Запросы на запись изменяют базу.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument(
+            '--warmup', type=int, default=100,
+            help='Запросы перед замером, не попадающие в результаты.',
+        )
+        parser.add_argument(
+            '--mix', type=parse_mix, default=DEFAULT_MIX,
+            help='Веса запросов, например `titles-list=30,auth-token=5`. '
+                 f'Доступны: {", ".join(SCENARIOS)}.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--sample-size', type=int, default=SAMPLE_SIZE)
+        target = parser.add_mutually_exclusive_group()
+        target.add_argument(
+            '--wsgi', action='store_true',
+            help='Поднять локальный WSGI-сервер и нагружать его по HTTP.',
+        )
+        target.add_argument(
+            '--url', help='Адрес уже запущенного сервера, например '
+                          '`http://127.0.0.1:8000`.',
+        )
+        parser.add_argument(
+            '--output', type=Path,
+            help='Файл для результатов в формате JSON.',
+        )
+        parser.add_argument(
+            '--baseline', type=Path,
+            help='JSON прошлого прогона для сравнения.',
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        data = get_test_data(options['sample_size'])
+        names, weights = zip(*options['mix'].items())
+        plan = [
+            (name, *SCENARIOS[name](data, rng))
+            for name in rng.choices(
+                names, weights, k=options['warmup'] + options['requests']
+            )
+        ]
+        connection.close()
+
+        server = None
+        target = options['url']
+        if options['wsgi']:
+            server = make_server(
+                '127.0.0.1', 0, get_wsgi_application(),
+                server_class=ThreadingWSGIServer, handler_class=QuietHandler,
+            )
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            target = f'http://127.0.0.1:{server.server_port}'
+        transport = HTTPTransport(target) if target else ClientTransport()
+        try:
+            self.run(transport, islice(plan, options['warmup']),
+                     options['threads'])
+            started = perf_counter()
+            samples = self.run(
+                transport, islice(plan, options['warmup'], None),
+                options['threads'],
+            )
+            elapsed = perf_counter() - started
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+
+        by_endpoint = defaultdict(list)
+        for name, *sample in samples:
+            by_endpoint[name].append(sample)
+        result = {
+            'commit': get_commit(),
+            'started': datetime.now(timezone.utc).isoformat(),
+            'target': target or 'client',
+            'threads': options['threads'],
+            'seed': options['seed'],
+            'mix': options['mix'],
+            'elapsed_s': elapsed,
+            'total': summarize([sample for _, *sample in samples], elapsed),
+            'endpoints': {
+                name: summarize(values, elapsed)
+                for name, values in sorted(by_endpoint.items())
+            },
+        }
+        baseline = None
+        if options['baseline']:
+            baseline = json.loads(options['baseline'].read_text())
+        self.report(result, baseline)
+        if options['output']:
+            options['output'].write_text(json.dumps(result, indent=2))
+            self.stdout.write(f'Results saved to {options["output"]}.')
+
+    def run(self, transport, plan, threads):
+        """Выполняет запросы плана и возвращает (имя, статус, время, SQL)."""
+        plan = iter(plan)
+        lock = threading.Lock()
+        samples = []
+
+        def worker():
+            results = []
+            try:
+                while True:
+                    with lock:
+                        item = next(plan, None)
+                    if item is None:
+                        return results
+                    name, method, path, data, token = item
+                    started = perf_counter()
+                    status, queries = transport.request(
+                        method, path, data, token
+                    )
+                    results.append((
+                        name, status, perf_counter() - started,
+                        int(queries) if queries is not None else None,
+                    ))
+            finally:
+                transport.close()
+
+        with ThreadPoolExecutor(threads) as executor:
+            for results in executor.map(
+                lambda _: worker(), range(threads)
+            ):
+                samples.extend(results)
+        return samples
+
+    def report(self, result, baseline=None):
+        rows = [('total', result['total'])]
+        rows += result['endpoints'].items()
+        self.stdout.write(
+            f'{result["total"]["requests"]} requests in '
+            f'{result["elapsed_s"]:.2f} s on {result["target"]} '
+            f'with {result["threads"]} threads.'
+        )
+        self.stdout.write(
+            f'{"endpoint":<18}{"requests":>9}{"errors":>7}{"req/s":>9}'
+            f'{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"queries":>9}'
+        )
+        for name, stats in rows:
+            queries = stats['mean_queries']
+            queries = '-' if queries is None else f'{queries:.1f}'
+            line = (
+                f'{name:<18}{stats["requests"]:>9}{stats["errors"]:>7}'
+                f'{stats["rps"]:>9.1f}{stats["p50_ms"]:>9.1f}'
+                f'{stats["p95_ms"]:>9.1f}{stats["p99_ms"]:>9.1f}'
+                f'{queries:>9}'
+            )
+            if baseline is not None:
+                line += self.compare(
+                    stats, baseline['total'] if name == 'total'
+                    else baseline['endpoints'].get(name)
+                )
+            self.stdout.write(line)
+
+    def compare(self, stats, previous):
+        if not previous:
+            return '  (new)'
+        return (
+            f'  req/s {get_change(stats["rps"], previous["rps"])}, '
+            f'p95 {get_change(stats["p95_ms"], previous["p95_ms"])}'
+        )
@@ -0,0 +1,158 @@
+"""Сверяет сохранённые рейтинги произведений с отзывами."""
+
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+
+import django
+from django.core.management import BaseCommand
+from django.db import connections, transaction
+
+from reviews.models import Review, Title
+from reviews.ratings import recalculate_title_ratings, save_rating_drift
+
+CHUNK_SIZE = 1000
+
+
+def get_chunk_bounds(chunk_size):
+    """
+    Границы пакетов (после id, до id включительно) по индексу первичного
+    ключа, без загрузки самих произведений.
+    """
+    bounds = []
+    lower = count = 0
+    pks = Title.objects.order_by('pk').values_list('pk', flat=True)
+    for pk in pks.iterator(chunk_size=chunk_size):
+        count += 1
+        if count == chunk_size:
+            bounds.append((lower, pk))
+            lower, count = pk, 0
+    if count:
+        bounds.append((lower, pk))
+    return bounds
+
+
+def reconcile_chunk(bounds):
+    """
+    Пересчитывает произведения из диапазона id одним сгруппированным
+    запросом и возвращает расхождения и их статистику, ничего не сохраняя.
+    Выполняется в процессе пула со своим соединением с базой; исправления
+    сохраняет родительский процесс, иначе параллельные записи упираются
+    в блокировку базы SQLite.
+    """
+    lower, upper = bounds
+    with transaction.atomic():
+        title_ids = list(
+            Title.objects.filter(pk__gt=lower, pk__lte=upper)
+            .values_list('pk', flat=True)
+        )
+        drift = recalculate_title_ratings(title_ids, save=False)
+    fields = Counter()
+    reviews_drift = score_drift = 0
+    for differences in drift.values():
+        fields.update(differences.keys())
+        stored, actual = differences.get('reviews_count', (0, 0))
+        reviews_drift += abs(actual - stored)
+        stored, actual = differences.get('score_sum', (0, 0))
+        score_drift += abs(actual - stored)
+    return {
+        'drift': drift,
+        'titles': len(title_ids),
+        'changed': len(drift),
+        'fields': fields,
+        'reviews_drift': reviews_drift,
+        'score_drift': score_drift,
+    }
+
+
+def init_worker():
+    django.setup()
+
+
+class Command(BaseCommand):
+    executor_class = ProcessPoolExecutor
+    help = (
+        'Пересчитывает количество отзывов, сумму оценок, рейтинги '
+        'и гистограммы произведений и исправляет расхождения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE,
+            help='Количество произведений в одном сгруппированном запросе.',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Количество процессов; 0 — без пула, в этом процессе.',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать расхождения, ничего не сохраняя.',
+        )
+
+    def handle(self, *args, **options):
+        started = perf_counter()
+        bounds = get_chunk_bounds(options['chunk_size'])
+        orphans = Review.objects.exclude(
+            title_id__in=Title.objects.values('pk')
+        ).count()
+        if options['workers'] and len(bounds) > 1:
+            # Процессы пула открывают собственные соединения,
+            # унаследованные от родителя использовать нельзя.
+            connections.close_all()
+            with self.executor_class(
+                max_workers=options['workers'], initializer=init_worker
+            ) as executor:
+                drift, totals = self.collect(
+                    executor.map(reconcile_chunk, bounds)
+                )
+        else:
+            drift, totals = self.collect(map(reconcile_chunk, bounds))
+        if not options['dry_run']:
+            self.save(drift, options['chunk_size'])
+        elapsed = perf_counter() - started
+        self.report(totals, orphans, elapsed, options['dry_run'])
+
+    def collect(self, results):
+        drift = {}
+        totals = {
+            'titles': 0, 'changed': 0, 'fields': Counter(),
+            'reviews_drift': 0, 'score_drift': 0,
+        }
+        for result in results:
+            drift.update(result.pop('drift'))
+            for key, value in result.items():
+                totals[key] += value
+        return drift, totals
+
+    def save(self, drift, chunk_size):
+        title_ids = sorted(drift)
+        for start in range(0, len(title_ids), chunk_size):
+            with transaction.atomic():
+                save_rating_drift({
+                    pk: drift[pk]
+                    for pk in title_ids[start:start + chunk_size]
+                })
+
+    def report(self, totals, orphans, elapsed, dry_run):
+        titles = totals['titles']
+        self.stdout.write(
+            f'{titles} titles checked in {elapsed:.2f} s '
+            f'({titles / elapsed if elapsed else 0:.0f} titles/s).'
+        )
+        action = 'would be fixed' if dry_run else 'fixed'
+        self.stdout.write(
+            f'{totals["changed"]} titles drifted and {action} '
+            f'({totals["changed"] / titles if titles else 0:.2%}).'
+        )
+        for field, count in sorted(totals['fields'].items()):
+            self.stdout.write(f'  {field}: {count} titles')
+        self.stdout.write(
+            f'Total drift: {totals["reviews_drift"]} reviews, '
+            f'{totals["score_drift"]} score points.'
+        )
+        if orphans:
+            self.stdout.write(
+                f'{orphans} reviews reference missing titles.'
+            )
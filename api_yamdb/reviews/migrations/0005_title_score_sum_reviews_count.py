@@ -0,0 +1,39 @@
+# Generated by Django 3.2 on 2026-10-18 18:13
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def fill_title_ratings(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    totals = (
+        Review.objects.values('title_id')
+        .annotate(score_sum=Sum('score'), reviews_count=Count('id'))
+        .order_by()
+    )
+    for row in totals:
+        Title.objects.filter(pk=row['title_id']).update(
+            score_sum=row['score_sum'], reviews_count=row['reviews_count']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_alter_title_year'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='reviews_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество отзывов'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Сумма оценок'),
+        ),
+        migrations.RunPython(fill_title_ratings, migrations.RunPython.noop),
+    ]
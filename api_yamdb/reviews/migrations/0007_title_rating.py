@@ -0,0 +1,35 @@
+# Generated by Django 3.2 on 2026-10-18 18:31
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_title_rating(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Title.objects.filter(reviews_count__gt=0).update(
+        rating=F('score_sum') / F('reviews_count')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_review_comment_pub_date_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating',
+            field=models.PositiveSmallIntegerField(editable=False, null=True, verbose_name='Рейтинг'),
+        ),
+        migrations.RunPython(fill_title_rating, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['rating', 'id'], name='title_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', 'rating', 'id'], name='title_category_rating_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 3.2 on 2026-10-18 18:33
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import ExpressionWrapper, F, FloatField, Value
+
+
+def fill_weighted_rating(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    weight = settings.RATING_PRIOR_WEIGHT
+    Title.objects.filter(reviews_count__gt=0).update(
+        weighted_rating=ExpressionWrapper(
+            (F('score_sum') + Value(float(settings.RATING_PRIOR_MEAN * weight)))
+            / (F('reviews_count') + weight),
+            output_field=FloatField(),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_title_rating'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='weighted_rating',
+            field=models.FloatField(editable=False, null=True, verbose_name='Взвешенный рейтинг'),
+        ),
+        migrations.RunPython(fill_weighted_rating, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['weighted_rating', 'id'], name='title_weighted_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', 'weighted_rating', 'id'], name='title_category_weighted_idx'),
+        ),
+    ]
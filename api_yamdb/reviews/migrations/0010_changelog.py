@@ -0,0 +1,32 @@
+# Generated by Django 3.2 on 2026-10-18 19:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_title_score_counts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_type', models.CharField(max_length=16, verbose_name='Тип объекта')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='Идентификатор объекта')),
+                ('action', models.CharField(choices=[('create', 'Создание'), ('update', 'Изменение'), ('delete', 'Удаление')], max_length=6, verbose_name='Действие')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Время изменения')),
+            ],
+            options={
+                'verbose_name': 'Изменение каталога',
+                'verbose_name_plural': 'Журнал изменений каталога',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='changelog',
+            index=models.Index(fields=['object_type', 'id'], name='changelog_type_id_idx'),
+        ),
+    ]
@@ -5,6 +5,12 @@ from .validators import validate_year
 
 MIN_SCORE = 1
 MAX_SCORE = 10
+SCORES = range(MIN_SCORE, MAX_SCORE + 1)
+
+
+def score_count_field(score):
+    """Имя поля произведения с количеством оценок score."""
+    return f'score_{score}_count'
 
 
 class Genre(models.Model):
@@ -57,15 +63,80 @@ class Title(models.Model):
         on_delete=models.SET_NULL,
         null=True,
     )
+    score_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок', default=0, editable=False,
+    )
+    reviews_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов', default=0, editable=False,
+    )
+    rating = models.PositiveSmallIntegerField(
+        verbose_name='Рейтинг', null=True, editable=False,
+    )
+    weighted_rating = models.FloatField(
+        verbose_name='Взвешенный рейтинг', null=True, editable=False,
+    )
+    # Гистограмма оценок: количество отзывов с каждой оценкой
+    # от MIN_SCORE до MAX_SCORE, поле называет score_count_field().
+    score_1_count = models.PositiveIntegerField(
+        verbose_name='Оценок 1', default=0, editable=False,
+    )
+    score_2_count = models.PositiveIntegerField(
+        verbose_name='Оценок 2', default=0, editable=False,
+    )
+    score_3_count = models.PositiveIntegerField(
+        verbose_name='Оценок 3', default=0, editable=False,
+    )
+    score_4_count = models.PositiveIntegerField(
+        verbose_name='Оценок 4', default=0, editable=False,
+    )
+    score_5_count = models.PositiveIntegerField(
+        verbose_name='Оценок 5', default=0, editable=False,
+    )
+    score_6_count = models.PositiveIntegerField(
+        verbose_name='Оценок 6', default=0, editable=False,
+    )
+    score_7_count = models.PositiveIntegerField(
+        verbose_name='Оценок 7', default=0, editable=False,
+    )
+    score_8_count = models.PositiveIntegerField(
+        verbose_name='Оценок 8', default=0, editable=False,
+    )
+    score_9_count = models.PositiveIntegerField(
+        verbose_name='Оценок 9', default=0, editable=False,
+    )
+    score_10_count = models.PositiveIntegerField(
+        verbose_name='Оценок 10', default=0, editable=False,
+    )
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
         ordering = ['year']
+        indexes = [
+            models.Index(fields=['rating', 'id'], name='title_rating_idx'),
+            models.Index(
+                fields=['category', 'rating', 'id'],
+                name='title_category_rating_idx',
+            ),
+            models.Index(
+                fields=['weighted_rating', 'id'],
+                name='title_weighted_rating_idx',
+            ),
+            models.Index(
+                fields=['category', 'weighted_rating', 'id'],
+                name='title_category_weighted_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    def get_score_counts(self):
+        """Гистограмма оценок: {оценка: количество отзывов}."""
+        return {
+            score: getattr(self, score_count_field(score)) for score in SCORES
+        }
+
 
 class Review(models.Model):
     title = models.ForeignKey(
@@ -104,6 +175,12 @@ class Review(models.Model):
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
         ordering = ['pub_date']
+        indexes = [
+            models.Index(
+                fields=['title', 'pub_date', 'id'],
+                name='review_title_pub_date_idx',
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['title', 'author'], name='unique_review'
@@ -140,6 +217,52 @@ class Comment(models.Model):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ['pub_date']
+        indexes = [
+            models.Index(
+                fields=['review', 'pub_date', 'id'],
+                name='comment_review_pub_date_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.text
+
+
+class ChangeLog(models.Model):
+    """
+    Журнал изменений каталога только для добавления: id записи служит
+    курсором, по которому потребители забирают изменения после него.
+    """
+    CREATE = 'create'
+    UPDATE = 'update'
+    DELETE = 'delete'
+    ACTION_CHOICES = (
+        (CREATE, 'Создание'),
+        (UPDATE, 'Изменение'),
+        (DELETE, 'Удаление'),
+    )
+    object_type = models.CharField(
+        verbose_name='Тип объекта', max_length=16,
+    )
+    object_id = models.PositiveBigIntegerField(
+        verbose_name='Идентификатор объекта',
+    )
+    action = models.CharField(
+        verbose_name='Действие', max_length=6, choices=ACTION_CHOICES,
+    )
+    created = models.DateTimeField(
+        verbose_name='Время изменения', auto_now_add=True,
+    )
+
+    class Meta:
+        verbose_name = 'Изменение каталога'
+        verbose_name_plural = 'Журнал изменений каталога'
+        ordering = ['id']
+        indexes = [
+            models.Index(
+                fields=['object_type', 'id'], name='changelog_type_id_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.action} {self.object_type} {self.object_id}'
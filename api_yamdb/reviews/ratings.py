@@ -0,0 +1,180 @@
+"""Денормализованный рейтинг произведений."""
+
+from django.conf import settings
+from django.db.models import (
+    Case, Count, ExpressionWrapper, F, FloatField, Value, When,
+)
+
+from .changelog import record
+from .models import SCORES, ChangeLog, Review, Title, score_count_field
+
+SCORE_COUNT_FIELDS = tuple(score_count_field(score) for score in SCORES)
+RATING_FIELDS = (
+    'score_sum', 'reviews_count', 'rating', 'weighted_rating',
+    *SCORE_COUNT_FIELDS,
+)
+
+
+def get_prior():
+    """Сумма и количество условных оценок байесовского сглаживания."""
+    weight = settings.RATING_PRIOR_WEIGHT
+    return settings.RATING_PRIOR_MEAN * weight, weight
+
+
+def update_title_rating(title_id, added_score=None, removed_score=None):
+    """
+    Атомарно учитывает добавленную и/или удалённую оценку отзыва
+    в сохранённых сумме оценок, количестве отзывов, рейтингах
+    и гистограмме оценок произведения и отмечает его изменение в журнале.
+    """
+    score_delta = (added_score or 0) - (removed_score or 0)
+    count_delta = (added_score is not None) - (removed_score is not None)
+    if not score_delta and not count_delta:
+        return
+    prior_sum, prior_count = get_prior()
+    score_sum = F('score_sum') + score_delta
+    reviews_count = F('reviews_count') + count_delta
+    # SET вычисляется по старым значениям строки: отзывов не останется,
+    # если их было ровно -count_delta.
+    no_reviews = When(reviews_count=-count_delta, then=None)
+    score_counts = {}
+    if added_score is not None:
+        field = score_count_field(added_score)
+        score_counts[field] = F(field) + 1
+    if removed_score is not None:
+        field = score_count_field(removed_score)
+        score_counts[field] = F(field) - 1
+    updated = Title.objects.filter(pk=title_id).update(
+        **score_counts,
+        score_sum=score_sum,
+        reviews_count=reviews_count,
+        rating=Case(no_reviews, default=score_sum / reviews_count),
+        weighted_rating=Case(
+            no_reviews,
+            default=ExpressionWrapper(
+                (score_sum + Value(float(prior_sum)))
+                / (reviews_count + prior_count),
+                output_field=FloatField(),
+            ),
+        ),
+    )
+    if updated:
+        record(Title, [title_id], ChangeLog.UPDATE)
+
+
+def get_rating(score_sum, reviews_count):
+    """Средняя оценка, округлённая вниз, или None без отзывов."""
+    if not reviews_count:
+        return None
+    return score_sum // reviews_count
+
+
+def get_weighted_rating(score_sum, reviews_count):
+    """
+    Средняя оценка, сглаженная к RATING_PRIOR_MEAN: произведение с одной
+    оценкой 10 не обгоняет произведение с тысячей оценок 9.
+    """
+    if not reviews_count:
+        return None
+    prior_sum, prior_count = get_prior()
+    return (score_sum + float(prior_sum)) / (reviews_count + prior_count)
+
+
+def recalculate_title_ratings(title_ids, save=True):
+    """
+    Пересчитывает сумму оценок, количество отзывов, рейтинги
+    и гистограммы оценок произведений одним сгруппированным запросом
+    и сохраняет только изменившиеся.
+    Возвращает расхождения: {id: {поле: (сохранённое, верное значение)}}.
+    """
+    title_ids = list(title_ids)
+    rows = (
+        Review.objects.filter(title_id__in=title_ids)
+        .values_list('title_id', 'score')
+        .annotate(reviews_count=Count('id'))
+        .order_by()
+    )
+    counts = {}
+    for title_id, score, reviews_count in rows:
+        counts.setdefault(title_id, {})[score] = reviews_count
+    changed = []
+    drift = {}
+    titles = Title.objects.filter(pk__in=title_ids).only(*RATING_FIELDS)
+    for title in titles:
+        score_counts = counts.get(title.pk, {})
+        score_sum = sum(
+            score * count for score, count in score_counts.items()
+        )
+        reviews_count = sum(score_counts.values())
+        values = (
+            score_sum,
+            reviews_count,
+            get_rating(score_sum, reviews_count),
+            get_weighted_rating(score_sum, reviews_count),
+            *(score_counts.get(score, 0) for score in SCORES),
+        )
+        differences = {
+            field: (getattr(title, field), value)
+            for field, value in zip(RATING_FIELDS, values)
+            if getattr(title, field) != value
+        }
+        if differences:
+            for field, (_, value) in differences.items():
+                setattr(title, field, value)
+            changed.append(title)
+            drift[title.pk] = differences
+    if save:
+        Title.objects.bulk_update(changed, RATING_FIELDS)
+        record(Title, [title.pk for title in changed], ChangeLog.UPDATE)
+    return drift
+
+
+def save_rating_drift(drift):
+    """
+    Сохраняет верные значения из расхождений recalculate_title_ratings,
+    вычисленных без сохранения, например в другом процессе.
+    """
+    titles = list(Title.objects.filter(pk__in=drift).only(*RATING_FIELDS))
+    for title in titles:
+        for field, (_, value) in drift[title.pk].items():
+            setattr(title, field, value)
+    Title.objects.bulk_update(titles, RATING_FIELDS)
+    record(Title, [title.pk for title in titles], ChangeLog.UPDATE)
+
+
+def get_score_percentile(score_counts, percent):
+    """
+    Процентиль оценок по гистограмме {оценка: количество} с линейной
+    интерполяцией между соседними оценками, как у отсортированного
+    списка всех оценок. None, если оценок нет.
+    """
+    total = sum(score_counts.values())
+    if not total:
+        return None
+    position = (total - 1) * percent / 100
+    lower = int(position)
+    lower_score = upper_score = None
+    seen = 0
+    for score in sorted(score_counts):
+        seen += score_counts[score]
+        if lower_score is None and seen > lower:
+            lower_score = score
+        if seen > lower + 1 or seen == total:
+            upper_score = score
+            break
+    fraction = position - lower
+    return lower_score + (upper_score - lower_score) * fraction
+
+
+def get_rating_distribution(score_counts, percents=(25, 75, 90)):
+    """Количество отзывов по оценкам, медиана и процентили."""
+    return {
+        'counts': {
+            str(score): score_counts.get(score, 0) for score in SCORES
+        },
+        'median': get_score_percentile(score_counts, 50),
+        'percentiles': {
+            str(percent): get_score_percentile(score_counts, percent)
+            for percent in percents
+        },
+    }
@@ -0,0 +1,123 @@
+"""Полнотекстовый поиск произведений на индексе SQLite FTS5."""
+
+import re
+
+from django.db import connection, connections
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+SEARCH_TABLE = 'reviews_title_fts'
+TITLE_TABLE = 'reviews_title'
+TRIGGERS = {
+    f'{SEARCH_TABLE}_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_insert
+        AFTER INSERT ON {TITLE_TABLE} BEGIN
+            INSERT INTO {SEARCH_TABLE} (rowid, name, description)
+            VALUES (new.id, new.name, new.description);
+        END
+    """,
+    f'{SEARCH_TABLE}_delete': f"""
+        CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_delete
+        AFTER DELETE ON {TITLE_TABLE} BEGIN
+            INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rowid, name,
+                                        description)
+            VALUES ('delete', old.id, old.name, old.description);
+        END
+    """,
+    f'{SEARCH_TABLE}_update': f"""
+        CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_update
+        AFTER UPDATE OF name, description ON {TITLE_TABLE} BEGIN
+            INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rowid, name,
+                                        description)
+            VALUES ('delete', old.id, old.name, old.description);
+            INSERT INTO {SEARCH_TABLE} (rowid, name, description)
+            VALUES (new.id, new.name, new.description);
+        END
+    """,
+}
+
+
+def is_supported(using=connection):
+    return using.vendor == 'sqlite'
+
+
+def install_search_index(using=connection):
+    """
+    Создаёт индекс FTS5 и триггеры, поддерживающие его в актуальном
+    состоянии при сохранении и удалении произведений.
+    Триггеры пропадают, когда миграция пересоздаёт таблицу произведений,
+    поэтому установка повторяется после каждой миграции; если чего-то
+    не хватало, индекс перестраивается.
+    """
+    if (not is_supported(using)
+            or TITLE_TABLE not in using.introspection.table_names()):
+        return False
+    with using.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE name IN (%s, %s, %s, %s)",
+            [SEARCH_TABLE, *TRIGGERS],
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        if existing == {SEARCH_TABLE, *TRIGGERS}:
+            return False
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+            f"name, description, content='{TITLE_TABLE}', "
+            "content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+        )
+        for sql in TRIGGERS.values():
+            cursor.execute(sql)
+    rebuild_search_index(using)
+    return True
+
+
+def install_search_index_after_migrate(sender, using, **kwargs):
+    install_search_index(connections[using])
+
+
+def rebuild_search_index(using=connection):
+    """Перестраивает индекс целиком по таблице произведений."""
+    with using.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('rebuild')"
+        )
+
+
+def build_match_query(text):
+    """
+    Запрос FTS5 из произвольной строки: слова в кавычках,
+    последнее слово ищется как префикс.
+    """
+    words = re.findall(r'\w+', text)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def search_titles(queryset, text):
+    """
+    Отбирает произведения, в названии или описании которых есть слова
+    из text, и упорядочивает их по релевантности.
+    """
+    match = build_match_query(text)
+    if match is None:
+        return queryset.none()
+    if not is_supported():
+        condition = Q()
+        for word in re.findall(r'\w+', text):
+            condition &= (
+                Q(name__icontains=word) | Q(description__icontains=word)
+            )
+        return queryset.filter(condition)
+    # Ранг — аннотация, а не .extra(): порядок ('search_rank', 'id')
+    # виден в query.order_by, по нему строится курсор постраничного вывода.
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s',
+        [match],
+    )).annotate(search_rank=RawSQL(
+        f'SELECT rank FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s '
+        f'AND rowid = {TITLE_TABLE}.id',
+        [match], output_field=FloatField(),
+    )).order_by('search_rank', 'id')
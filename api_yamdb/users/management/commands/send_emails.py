@@ -0,0 +1,103 @@
+"""
+Отправляет письма из очереди пакетами через одно соединение
+на каждый проход по очереди.
+"""
+
+from datetime import timedelta
+from time import perf_counter, sleep
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from users.models import OutgoingEmail
+
+BATCH_SIZE = 100
+MAX_ATTEMPTS = 5
+RETRY_DELAY = timedelta(minutes=1)
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди исходящих писем.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--max-attempts', type=int, default=MAX_ATTEMPTS)
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Не завершаться, а ждать новые письма.',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Пауза между проверками очереди в режиме --loop, секунд.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            # Свежее соединение на каждый проход: за паузу в режиме --loop
+            # сервер может закрыть простаивающее.
+            with get_connection() as connection:
+                sent = self.drain(connection, options)
+            if not options['loop']:
+                break
+            if not sent:
+                sleep(options['interval'])
+
+    def drain(self, connection, options):
+        total = 0
+        while True:
+            batch = list(self.get_pending(options)[:options['batch_size']])
+            if not batch:
+                return total
+            started = perf_counter()
+            sent, failed = self.send_batch(connection, batch)
+            elapsed = perf_counter() - started
+            total += sent
+            self.stdout.write(
+                f'Batch: {sent} sent, {failed} failed in {elapsed:.2f} s '
+                f'({sent / elapsed if elapsed else 0:.0f} emails/s).'
+            )
+
+    def get_pending(self, options):
+        return OutgoingEmail.objects.filter(
+            sent__isnull=True,
+            next_attempt__lte=timezone.now(),
+            attempts__lt=options['max_attempts'],
+        ).order_by('id')
+
+    def send_batch(self, connection, batch):
+        now = timezone.now()
+        sent = 0
+        for email in batch:
+            message = EmailMessage(
+                email.subject,
+                email.body,
+                email.from_email,
+                [email.to],
+                connection=connection,
+            )
+            email.attempts += 1
+            try:
+                message.send()
+            except Exception as error:
+                # Повторная попытка с экспоненциально растущей паузой.
+                email.last_error = str(error)
+                email.next_attempt = now + RETRY_DELAY * 2 ** email.attempts
+                # После ошибки соединение может быть разорвано.
+                self.reconnect(connection)
+                continue
+            email.sent = now
+            email.last_error = ''
+            sent += 1
+        OutgoingEmail.objects.bulk_update(
+            batch, ('attempts', 'sent', 'next_attempt', 'last_error')
+        )
+        return sent, len(batch) - sent
+
+    def reconnect(self, connection):
+        try:
+            connection.close()
+            connection.open()
+        except Exception as error:
+            # Следующая отправка сама попробует открыть соединение.
+            self.stderr.write(f'Reconnect failed: {error}')
@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-18 20:00
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_outgoingemail'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Lower('username'), name='users_username_lower_idx'),
+        ),
+    ]
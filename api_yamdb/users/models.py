@@ -1,6 +1,8 @@
 from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.db import models
+from django.db.models.functions import Lower
+from django.utils import timezone
 
 from .validators import validate_username
 
@@ -38,6 +40,35 @@ class User(AbstractUser):
         choices=ROLE_CHOICES,
         default=USER,
     )
+    version = models.PositiveIntegerField(
+        'Версия прав доступа',
+        default=0,
+        editable=False,
+    )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_access = instance.get_access()
+        return instance
+
+    def get_access(self):
+        """Поля, от которых зависят права доступа пользователя."""
+        return (
+            self.__dict__.get('role'),
+            self.__dict__.get('is_active'),
+            self.__dict__.get('is_superuser'),
+        )
+
+    def save(self, *args, **kwargs):
+        access = self.get_access()
+        loaded_access = getattr(self, '_loaded_access', None)
+        if loaded_access is not None and loaded_access != access:
+            self.version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+        super().save(*args, **kwargs)
+        self._loaded_access = access
 
     @property
     def is_admin(self):
@@ -49,8 +80,41 @@ class User(AbstractUser):
 
     class Meta:
         ordering = ['id']
+        indexes = [
+            # Поиск `?search=` по началу имени без учёта регистра.
+            models.Index(Lower('username'), name='users_username_lower_idx'),
+        ]
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
 
     def __str__(self):
         return self.username
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку."""
+    subject = models.CharField('Тема', max_length=255)
+    body = models.TextField('Текст')
+    from_email = models.EmailField('Отправитель', max_length=254)
+    to = models.EmailField('Получатель', max_length=254)
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    next_attempt = models.DateTimeField(
+        'Следующая попытка', default=timezone.now
+    )
+    attempts = models.PositiveSmallIntegerField('Попытки', default=0)
+    sent = models.DateTimeField('Отправлено', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        indexes = [
+            models.Index(
+                fields=['sent', 'next_attempt'],
+                name='outgoing_email_pending_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.to}: {self.subject}'
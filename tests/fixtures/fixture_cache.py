@@ -0,0 +1,22 @@
+import pytest
+from django.core.cache import cache
+
+from api.authentication import user_cache
+from api.autocomplete import prefix_index
+from api.genre_index import genre_index
+from api.middleware import route_stats
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    cache.clear()
+    user_cache.clear()
+    prefix_index.clear()
+    genre_index.clear()
+    route_stats.clear()
+    yield
+    cache.clear()
+    user_cache.clear()
+    prefix_index.clear()
+    genre_index.clear()
+    route_stats.clear()
@@ -0,0 +1,8 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def raise_on_n_plus_one(settings):
+    """Повторяющиеся однотипные запросы (N+1) в API валят тесты."""
+    settings.NPLUSONE_ENABLED = True
+    settings.NPLUSONE_RAISE = True
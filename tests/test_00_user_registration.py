@@ -1,9 +1,12 @@
 from http import HTTPStatus
+from io import StringIO
 
 import pytest
 from django.core import mail
+from django.core.management import call_command
 from django.db.utils import IntegrityError
 
+from users.models import OutgoingEmail
 from tests.utils import (invalid_data_for_user_patch_and_creation,
                          invalid_data_for_username_and_email_fields)
 
@@ -110,6 +113,7 @@ class Test00UserRegistration:
         }
 
         response = client.post(self.url_signup, data=valid_data)
+        call_command('send_emails', stdout=StringIO())
         outbox_after = mail.outbox  # email outbox after user create
 
         assert response.status_code != HTTPStatus.NOT_FOUND, (
@@ -159,6 +163,7 @@ class Test00UserRegistration:
         response = admin_client.post(
             self.url_admin_create_user, data=valid_data
         )
+        call_command('send_emails', stdout=StringIO())
         outbox_after = mail.outbox
 
         assert response.status_code != HTTPStatus.NOT_FOUND, (
@@ -373,3 +378,30 @@ class Test00UserRegistration:
             'пользователя, созданного администратором,  возвращает ответ '
             'со статусом 200.'
         )
+
+    def test_signup_email_retried_after_failure(self, client, monkeypatch):
+        valid_data = {
+            'email': 'retry@yamdb.fake',
+            'username': 'retry_username'
+        }
+        client.post(self.url_signup, data=valid_data)
+        assert len(mail.outbox) == 0, (
+            f'Проверьте, что POST-запрос к `{self.url_signup}` ставит письмо '
+            'в очередь, а не отправляет его во время обработки запроса.'
+        )
+
+        def fail(*args, **kwargs):
+            raise ConnectionError('smtp is down')
+
+        monkeypatch.setattr('django.core.mail.EmailMessage.send', fail)
+        call_command('send_emails', stdout=StringIO())
+        email = OutgoingEmail.objects.get(to=valid_data['email'])
+        assert email.attempts == 1 and email.sent is None
+        assert email.last_error == 'smtp is down'
+
+        monkeypatch.undo()
+        OutgoingEmail.objects.update(next_attempt=email.created)
+        call_command('send_emails', stdout=StringIO())
+        assert [message.to for message in mail.outbox] == [
+            [valid_data['email']]
+        ]
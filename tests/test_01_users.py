@@ -131,6 +131,34 @@ class Test01UserAPI:
             f'корректными данными: {", ".join(admin_as_dict.keys())}.'
         )
 
+    def test_04_03_users_search_prefix_and_cursor(self, user, moderator,
+                                                  admin_client, admin):
+        url = '/api/v1/users/'
+        response = admin_client.get(f'{url}?search=TestMod')
+        usernames = [item['username'] for item in response.json()['results']]
+        assert usernames == [moderator.username], (
+            'Проверьте, что поиск по `/api/v1/users/?search={prefix}` '
+            'возвращает пользователей, `username` которых начинается с '
+            'переданной строки.'
+        )
+        response = admin_client.get(f'{url}?search=testmod')
+        usernames = [item['username'] for item in response.json()['results']]
+        assert usernames == [moderator.username], (
+            'Проверьте, что поиск по `/api/v1/users/?search={prefix}` '
+            'не учитывает регистр.'
+        )
+        response = admin_client.get(f'{url}?search=Moderator')
+        assert response.json()['results'] == []
+
+        response = admin_client.get(f'{url}?cursor=&limit=2')
+        data = response.json()
+        assert len(data['results']) == 2 and data['next'], (
+            'Проверьте, что `/api/v1/users/?cursor=` поддерживает '
+            'постраничный вывод по курсору.'
+        )
+        data = admin_client.get(data['next']).json()
+        assert len(data['results']) == 1 and data['next'] is None
+
     def test_04_01_users_get_admin_only(self, user_client, moderator_client):
         url = '/api/v1/users/'
         for client in (user_client, moderator_client):
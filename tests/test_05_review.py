@@ -1,10 +1,13 @@
 from http import HTTPStatus
 
 import pytest
+from django.db import connection
 from django.db.utils import IntegrityError
+from django.test.utils import CaptureQueriesContext
 
-from tests.utils import (check_fields, check_pagination, create_reviews,
-                         create_single_review, create_titles)
+from reviews.ratings import recalculate_title_ratings
+from tests.utils import (check_fields, check_pagination, create_comments,
+                         create_reviews, create_single_review, create_titles)
 
 
 @pytest.mark.django_db(transaction=True)
@@ -384,3 +387,86 @@ class Test05ReviewAPI:
                 f'Проверьте, что DELETE-запрос {role} к чужому отзыву через '
                 f'`{url_template}` удаляет отзыв.'
             )
+
+    def test_06_rating_follows_review_changes(self, admin_client, admin,
+                                              user_client, user):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        review_url = f'{title_url}reviews/{reviews[1]["id"]}/'
+
+        user_client.patch(review_url, data={'score': 10})
+        response = admin_client.get(title_url)
+        assert response.json().get('rating') == 7, (
+            'Проверьте, что после изменения оценки отзыва рейтинг '
+            'произведения пересчитывается.'
+        )
+
+        user_client.delete(review_url)
+        response = admin_client.get(title_url)
+        assert response.json().get('rating') == 5, (
+            'Проверьте, что после удаления отзыва рейтинг произведения '
+            'пересчитывается.'
+        )
+
+        admin_client.delete(f'{title_url}reviews/{reviews[0]["id"]}/')
+        response = admin_client.get(title_url)
+        assert response.json().get('rating') is None, (
+            'Проверьте, что у произведения без отзывов рейтинг равен `None`.'
+        )
+
+    def test_07_rating_follows_author_delete(self, admin_client, admin,
+                                             user_client, user):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+        }
+        comments, reviews, titles = create_comments(admin_client, author_map)
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        comments_url = f'{title_url}reviews/{reviews[0]["id"]}/comments/'
+        user_client.patch(
+            f'{title_url}reviews/{reviews[1]["id"]}/', data={'score': 10}
+        )
+        assert admin_client.get(title_url).json().get('rating') == 7
+        assert len(admin_client.get(f'{title_url}reviews/').json()[
+            'results'
+        ]) == 2
+        assert len(admin_client.get(comments_url).json()['results']) == 2
+
+        admin_client.delete(f'/api/v1/users/{user.username}/')
+        response = admin_client.get(title_url)
+        assert response.json().get('rating') == 5, (
+            'Проверьте, что после удаления пользователя рейтинг '
+            'произведений с его отзывами пересчитывается.'
+        )
+        assert recalculate_title_ratings([titles[0]['id']], save=False) == {}
+        assert len(admin_client.get(f'{title_url}reviews/').json()[
+            'results'
+        ]) == 1, (
+            'Проверьте, что удаление пользователя сбрасывает кэш отзывов.'
+        )
+        assert len(admin_client.get(comments_url).json()['results']) == 1, (
+            'Проверьте, что удаление пользователя сбрасывает кэш '
+            'комментариев.'
+        )
+
+    def test_08_author_delete_queries(self, admin_client, user_client, user,
+                                      moderator_client, moderator):
+        _, titles = create_reviews(admin_client, {user: user_client})
+        create_single_review(moderator_client, titles[0]['id'], 'Отзыв', 3)
+        create_single_review(moderator_client, titles[1]['id'], 'Отзыв', 9)
+        queries = []
+        for author in (user, moderator):
+            with CaptureQueriesContext(connection) as context:
+                admin_client.delete(f'/api/v1/users/{author.username}/')
+            queries.append(len(context))
+        assert queries[0] == queries[1], (
+            'Проверьте, что число запросов при удалении пользователя '
+            'не растёт с числом его отзывов.'
+        )
+        assert recalculate_title_ratings(
+            [title['id'] for title in titles], save=False
+        ) == {}
@@ -381,3 +381,33 @@ class Test06CommentAPI:
             'Проверьте, что DELETE-запрос неавторизованного пользователя к '
             f'`{url}` возвращает ответ со статусом 401.'
         )
+
+    def test_07_comments_cache_after_delete(self, admin_client, admin,
+                                            user_client, user):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+        }
+        comments, reviews, titles = create_comments(admin_client, author_map)
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        review_url = f'{title_url}reviews/{reviews[0]["id"]}/'
+        comments_url = f'{review_url}comments/'
+        assert admin_client.get(comments_url).status_code == HTTPStatus.OK
+
+        admin_client.delete(review_url)
+        response = admin_client.get(comments_url)
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что удаление отзыва сбрасывает кэш его комментариев.'
+        )
+
+        comments_url = f'{title_url}reviews/{reviews[1]["id"]}/comments/'
+        create_single_comment(
+            user_client, titles[0]['id'], reviews[1]['id'], 'comment'
+        )
+        assert admin_client.get(comments_url).status_code == HTTPStatus.OK
+        admin_client.delete(title_url)
+        response = admin_client.get(comments_url)
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что удаление произведения сбрасывает кэш '
+            'комментариев к его отзывам.'
+        )
@@ -0,0 +1,202 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import (create_comments, create_reviews, create_single_review,
+                         create_titles)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08QueriesAPI:
+
+    def test_01_title_list_queries(self, client, admin_client, user_client,
+                                   django_assert_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        for title in titles:
+            create_single_review(user_client, title['id'], 'text', 7)
+        url = '/api/v1/titles/'
+
+        # COUNT, страница произведений с категориями и рейтингом, жанры.
+        with django_assert_num_queries(3):
+            response = client.get(url)
+        assert len(response.json()['results']) == len(titles)
+
+        for idx in range(5):
+            admin_client.post(url, data={
+                'name': f'Произведение {idx}',
+                'year': 2000 + idx,
+                'genre': [titles[0]['genre'][0]],
+                'category': titles[0]['category'],
+            })
+        with django_assert_num_queries(3):
+            response = client.get(url)
+        assert len(response.json()['results']) == len(titles) + 5, (
+            'Проверьте, что количество SQL-запросов при GET-запросе к '
+            f'`{url}` не зависит от количества произведений на странице.'
+        )
+
+    def test_02_title_detail_queries(self, client, admin_client,
+                                     django_assert_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        with django_assert_num_queries(2):
+            client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+
+    def test_03_review_list_queries(self, client, admin_client, admin,
+                                    user_client, user, moderator_client,
+                                    moderator, django_assert_num_queries):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        # Произведение, COUNT, страница отзывов с авторами.
+        with django_assert_num_queries(3):
+            response = client.get(url)
+        assert len(response.json()['results']) == len(reviews)
+
+    def test_04_review_create_queries(self, admin_client, user_client,
+                                      django_assert_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        user_client.get('/api/v1/users/me/')
+        # Произведение, BEGIN, добавление отзыва, обновление рейтинга
+        # и две записи в журнал изменений: об отзыве и о произведении.
+        with django_assert_num_queries(6):
+            response = user_client.post(url, data={'text': 'a', 'score': 5})
+        assert response.status_code == HTTPStatus.CREATED
+
+        with django_assert_num_queries(3):
+            response = user_client.post(url, data={'text': 'b', 'score': 5})
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что повторный отзыв на произведение отклоняется '
+            'со статусом 400.'
+        )
+
+    def test_05_comment_list_queries(self, client, admin_client, admin,
+                                     user_client, user, moderator_client,
+                                     moderator, django_assert_num_queries):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        comments, reviews, titles = create_comments(admin_client, author_map)
+        url = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+            f'{reviews[0]["id"]}/comments/'
+        )
+        # Отзыв, COUNT, страница комментариев с авторами.
+        with django_assert_num_queries(3):
+            response = client.get(url)
+        results = response.json()['results']
+        assert len(results) == len(comments)
+        assert all(
+            comment['review'] == reviews[0]['id'] for comment in results
+        ), (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит id '
+            'отзыва в поле `review`, а не его текст.'
+        )
+
+        with django_assert_num_queries(3):
+            response = client.get(f'{url}?expand=review')
+        assert all(
+            comment['review'] == reviews[0]['text']
+            for comment in response.json()['results']
+        ), (
+            f'Проверьте, что GET-запрос к `{url}?expand=review` возвращает '
+            'текст отзыва в поле `review`.'
+        )
+
+    def test_06_cached_responses(self, client, admin_client, user_client,
+                                 django_assert_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        reviews_url = f'{title_url}reviews/'
+        client.get(title_url)
+        client.get(reviews_url)
+        with django_assert_num_queries(0):
+            response = client.get(title_url)
+            client.get(reviews_url)
+        assert response.json()['rating'] is None
+
+        create_single_review(user_client, titles[0]['id'], 'text', 8)
+        response = client.get(title_url)
+        assert response.json()['rating'] == 8, (
+            'Проверьте, что добавление отзыва сбрасывает закэшированный '
+            f'ответ на GET-запрос к `{title_url}`.'
+        )
+        assert len(client.get(reviews_url).json()['results']) == 1
+
+    def test_07_conditional_get(self, client, admin_client, user_client,
+                                django_assert_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        response = client.get(url)
+        etag = response['ETag']
+        assert etag, (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'заголовок `ETag`.'
+        )
+        assert 'Last-Modified' not in response, (
+            'Проверьте, что ответ не содержит `Last-Modified` с точностью '
+            'до секунды: изменения в ту же секунду были бы незаметны.'
+        )
+        with django_assert_num_queries(0):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с актуальным '
+            '`If-None-Match` возвращает ответ со статусом 304.'
+        )
+        response = client.get(
+            url, HTTP_IF_MODIFIED_SINCE='Wed, 21 Oct 2099 07:28:00 GMT'
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что без `Last-Modified` заголовок '
+            '`If-Modified-Since` не приводит к ответу 304.'
+        )
+
+        create_single_review(user_client, titles[0]['id'], 'text', 8)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что после добавления отзыва GET-запрос к `{url}` '
+            'со старым `If-None-Match` возвращает ответ со статусом 200.'
+        )
+        assert response['ETag'] != etag
+
+    def test_08_precise_invalidation(self, client, admin_client, user_client,
+                                     user):
+        titles, _, _ = create_titles(admin_client)
+        other_url = f'/api/v1/titles/{titles[1]["id"]}/'
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        create_single_review(user_client, titles[0]['id'], 'text', 8)
+        other_etag = client.get(other_url)['ETag']
+        reviews_etag = client.get(reviews_url)['ETag']
+
+        create_single_review(admin_client, titles[0]['id'], 'text', 6)
+        response = client.get(other_url, HTTP_IF_NONE_MATCH=other_etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что отзыв на одно произведение не сбрасывает кэш '
+            'страниц других произведений.'
+        )
+        response = client.get(
+            f'/api/v1/titles/{titles[0]["id"]}/'
+        )
+        assert response.json()['rating'] == 7
+
+        reviews_etag = client.get(reviews_url)['ETag']
+        user_client.patch('/api/v1/users/me/', data={'bio': 'Новая'})
+        response = client.get(reviews_url, HTTP_IF_NONE_MATCH=reviews_etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что изменение пользователя, не затрагивающее его '
+            'имя, не сбрасывает кэш отзывов.'
+        )
+        user_client.patch('/api/v1/users/me/', data={'username': 'renamed'})
+        response = client.get(reviews_url)
+        assert 'renamed' in {
+            review['author'] for review in response.json()['results']
+        }, (
+            'Проверьте, что смена имени пользователя сбрасывает кэш '
+            'отзывов с его именем.'
+        )
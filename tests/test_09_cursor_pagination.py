@@ -0,0 +1,108 @@
+import json
+from base64 import urlsafe_b64encode
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_reviews, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09CursorPaginationAPI:
+
+    def collect_pages(self, client, url):
+        results = []
+        pages = 0
+        while url:
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что GET-запрос к `{url}` с параметром `cursor` '
+                'возвращает ответ со статусом 200.'
+            )
+            data = response.json()
+            assert 'count' not in data, (
+                'Проверьте, что при постраничном выводе по курсору общее '
+                'количество записей не считается без параметра `count`.'
+            )
+            results.extend(data['results'])
+            url = data['next']
+            pages += 1
+        return results, pages
+
+    def test_01_titles_cursor(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        for idx in range(3):
+            admin_client.post('/api/v1/titles/', data={
+                'name': f'Произведение {idx}',
+                'year': 1984,
+                'genre': titles[0]['genre'],
+                'category': titles[0]['category'],
+            })
+        results, pages = self.collect_pages(
+            client, '/api/v1/titles/?cursor=&limit=2'
+        )
+        assert pages == 3
+        keys = [(title['year'], title['id']) for title in results]
+        assert keys == sorted(keys), (
+            'Проверьте, что при постраничном выводе по курсору произведения '
+            'упорядочены по `year` и `id`.'
+        )
+        assert len(set(keys)) == len(titles) + 3
+
+        response = client.get('/api/v1/titles/?cursor=&count=1')
+        assert response.json()['count'] == len(titles) + 3
+
+    def test_02_reviews_cursor_previous(self, client, admin_client, admin,
+                                        user_client, user, moderator_client,
+                                        moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/?cursor=&limit=2'
+        results, _ = self.collect_pages(client, url)
+        assert [review['id'] for review in results] == [
+            review['id'] for review in reviews
+        ]
+
+        data = client.get(url).json()
+        data = client.get(data['next']).json()
+        previous = client.get(data['previous']).json()
+        assert [review['id'] for review in previous['results']] == [
+            review['id'] for review in reviews[:2]
+        ], (
+            'Проверьте, что ссылка `previous` при постраничном выводе по '
+            'курсору ведёт на предыдущую страницу.'
+        )
+
+    def test_03_invalid_cursor(self, client, admin_client):
+        create_titles(admin_client)
+        response = client.get('/api/v1/titles/?cursor=broken')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_04_malformed_cursor_values(self, admin_client, admin):
+        reviews, titles = create_reviews(admin_client, {admin: admin_client})
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        cases = (
+            ('/api/v1/titles/', 'cursor', [{'x': 1}, 1]),
+            ('/api/v1/titles/', 'cursor', [2000]),
+            ('/api/v1/titles/?ordering=-rating', 'cursor', [[5], 1]),
+            (reviews_url, 'cursor', ['notadate', 1]),
+            (reviews_url, 'cursor', [None, 'abc']),
+            ('/api/v1/changes/', 'since', ['abc']),
+            ('/api/v1/changes/', 'since', [1, 2]),
+            ('/api/v1/changes/', 'since', [10 ** 30]),
+            ('/api/v1/titles/', 'cursor', [2000, -2 ** 64]),
+        )
+        for url, param, position in cases:
+            cursor = urlsafe_b64encode(
+                json.dumps({'p': position}).encode()
+            ).decode()
+            separator = '&' if '?' in url else '?'
+            response = admin_client.get(f'{url}{separator}{param}={cursor}')
+            assert response.status_code == HTTPStatus.NOT_FOUND, (
+                f'Проверьте, что GET-запрос к `{url}` с курсором {position} '
+                'неподходящих типов возвращает ответ со статусом 404.'
+            )
@@ -0,0 +1,93 @@
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.authentication import user_cache
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10TokenClaims:
+
+    def get_client(self, client, user):
+        response = client.post('/api/v1/auth/token/', data={
+            'username': user.username,
+            'confirmation_code': default_token_generator.make_token(user),
+        })
+        assert response.status_code == HTTPStatus.OK
+        token = response.json()['token']
+        api_client = APIClient()
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return api_client, AccessToken(token)
+
+    def test_01_token_has_version_claim(self, client, admin):
+        _, token = self.get_client(client, admin)
+        assert token['version'] == admin.version, (
+            'Проверьте, что токен содержит версию прав доступа пользователя.'
+        )
+
+    def test_02_cached_user_skips_db(self, client, admin,
+                                     django_assert_num_queries):
+        admin_client, _ = self.get_client(client, admin)
+        admin_client.get('/api/v1/users/me/')
+        with django_assert_num_queries(0):
+            response = admin_client.get('/api/v1/users/me/')
+        assert response.status_code == HTTPStatus.OK
+
+    def test_03_role_change_invalidates_cache(self, client, admin, user,
+                                              django_user_model):
+        admin_client, _ = self.get_client(client, admin)
+        user_client, _ = self.get_client(client, user)
+        response = user_client.get('/api/v1/users/')
+        assert response.status_code == HTTPStatus.FORBIDDEN
+
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'role': 'admin'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        user.refresh_from_db()
+        assert user.version == 1, (
+            'Проверьте, что смена роли увеличивает версию прав доступа.'
+        )
+        response = user_client.get('/api/v1/users/')
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после смены роли пользователь получает права '
+            'новой роли без повторного получения токена.'
+        )
+
+        django_user_model.objects.filter(pk=user.pk).update(is_active=False)
+        user = django_user_model.objects.get(pk=user.pk)
+        user.save()
+        response = user_client.get('/api/v1/users/')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+    def test_04_demotion_in_other_process(self, client, admin):
+        admin_client, _ = self.get_client(client, admin)
+        assert admin_client.get('/api/v1/users/').status_code == HTTPStatus.OK
+        stale = user_cache.get(admin.pk)
+
+        # Другой процесс понижает роль: общий кэш версий обновляется,
+        # а в кэше этого процесса остаётся прежняя копия пользователя.
+        admin.refresh_from_db()
+        admin.role = 'user'
+        admin.save()
+        user_cache.set(stale)
+
+        response = admin_client.get('/api/v1/users/')
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что смена роли в другом процессе отменяет права, '
+            'закэшированные этим процессом.'
+        )
+        user_cache.set(stale)
+        response = admin_client.patch(
+            '/api/v1/users/me/', data={'bio': 'Новая биография'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        admin.refresh_from_db()
+        assert admin.role == 'user' and admin.version == 1, (
+            'Проверьте, что PATCH-запрос к `/api/v1/users/me/` не '
+            'возвращает в базу устаревшие права из кэша процесса.'
+        )
+        assert admin.bio == 'Новая биография'
@@ -0,0 +1,85 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11TitleSearchAPI:
+    url = '/api/v1/titles/'
+
+    def search(self, client, text):
+        response = client.get(self.url, {'search': text})
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{self.url}?search=<text>` '
+            'возвращает ответ со статусом 200.'
+        )
+        return [title['name'] for title in response.json()['results']]
+
+    def test_01_search_name_and_description(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        assert self.search(client, 'терминат') == [titles[0]['name']], (
+            f'Проверьте, что `{self.url}?search=<text>` ищет по началу слов '
+            'в названии произведения.'
+        )
+        assert self.search(client, 'yippie') == [titles[1]['name']], (
+            f'Проверьте, что `{self.url}?search=<text>` ищет по описанию '
+            'произведения.'
+        )
+        assert self.search(client, '"(') == []
+
+    def test_02_search_ranked(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        admin_client.post(self.url, data={
+            'name': 'Орешек знаний',
+            'year': 1990,
+            'genre': titles[0]['genre'],
+            'category': titles[0]['category'],
+            'description': 'Орешек, орешек и ещё раз орешек',
+        })
+        assert self.search(client, 'орешек') == [
+            'Орешек знаний', titles[1]['name']
+        ], (
+            'Проверьте, что результаты поиска упорядочены по релевантности.'
+        )
+
+    def test_03_search_index_follows_changes(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        title_url = f'{self.url}{titles[0]["id"]}/'
+        admin_client.patch(title_url, data={'name': 'Робокоп'})
+        assert self.search(client, 'терминатор') == []
+        assert self.search(client, 'робокоп') == ['Робокоп']
+
+        admin_client.delete(title_url)
+        assert self.search(client, 'робокоп') == [], (
+            'Проверьте, что удалённые произведения не попадают в результаты '
+            'поиска.'
+        )
+
+    def test_04_search_ranked_with_cursor(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        for name in ('Орешек знаний', 'Орешек'):
+            admin_client.post(self.url, data={
+                'name': name,
+                'year': 1970,
+                'genre': titles[0]['genre'],
+                'category': titles[0]['category'],
+                'description': 'Орешек, орешек и ещё раз орешек',
+            })
+        expected = self.search(client, 'орешек')
+        assert len(expected) == 3
+        names = []
+        url = self.url
+        params = {'search': 'орешек', 'cursor': '', 'limit': 1}
+        while url:
+            response = client.get(url, params)
+            params = None
+            assert response.status_code == HTTPStatus.OK
+            data = response.json()
+            names += [title['name'] for title in data['results']]
+            url = data['next']
+        assert names == expected, (
+            'Проверьте, что постраничный вывод по курсору сохраняет '
+            'упорядочивание результатов поиска по релевантности.'
+        )
@@ -0,0 +1,74 @@
+from http import HTTPStatus
+
+import pytest
+
+from api.autocomplete import prefix_index
+from reviews.models import Title
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12AutocompleteAPI:
+    url = '/api/v1/autocomplete/'
+
+    def test_01_autocomplete(self, client, admin_client,
+                             django_assert_num_queries):
+        titles, categories, genres = create_titles(admin_client)
+        response = client.get(self.url)
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            f'Проверьте, что GET-запрос к `{self.url}` без параметра `q` '
+            'возвращает ответ со статусом 400.'
+        )
+
+        response = client.get(self.url, {'q': 'к'})
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == [
+            {'type': 'category', 'slug': categories[1]['slug'],
+             'name': categories[1]['name']},
+            {'type': 'genre', 'slug': genres[1]['slug'],
+             'name': genres[1]['name']},
+            {'type': 'title', 'id': titles[1]['id'],
+             'name': titles[1]['name']},
+        ], (
+            f'Проверьте, что GET-запрос к `{self.url}?q=<prefix>` возвращает '
+            'в алфавитном порядке произведения, жанры и категории, название '
+            'которых начинается с `q`.'
+        )
+        with django_assert_num_queries(0):
+            response = client.get(
+                self.url, {'q': 'К', 'type': 'title', 'limit': 1}
+            )
+        assert [item['name'] for item in response.json()] == [
+            titles[1]['name']
+        ]
+
+    def test_02_autocomplete_follows_changes(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        client.get(self.url, {'q': 'т'})
+        admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/', data={'name': 'Робокоп'}
+        )
+        admin_client.post('/api/v1/genres/', data={
+            'name': 'Триллер', 'slug': 'thriller'
+        })
+        response = client.get(self.url, {'q': 'т'})
+        assert [item['name'] for item in response.json()] == ['Триллер'], (
+            'Проверьте, что подсказки обновляются при изменении и '
+            'добавлении объектов.'
+        )
+        admin_client.delete('/api/v1/genres/thriller/')
+        assert client.get(self.url, {'q': 'т'}).json() == []
+
+    def test_03_change_in_other_process(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        response = client.get(self.url, {'q': 'терм'})
+        assert [item['name'] for item in response.json()] == [
+            titles[0]['name']
+        ]
+        Title.objects.filter(pk=titles[0]['id']).update(name='Робокоп')
+        prefix_index.counter.increment()
+        response = client.get(self.url, {'q': 'терм'})
+        assert response.json() == [], (
+            'Проверьте, что подсказки учитывают изменения, сделанные '
+            'другими процессами.'
+        )
@@ -0,0 +1,85 @@
+from http import HTTPStatus
+
+import pytest
+
+from api.cache import invalidate
+from api.genre_index import genre_index
+from reviews.models import Title
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13GenreFilterAPI:
+    url = '/api/v1/titles/'
+
+    def filter(self, client, **params):
+        response = client.get(self.url, params)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{self.url}?genre=<slug>,<slug>` '
+            'возвращает ответ со статусом 200.'
+        )
+        return sorted(title['name'] for title in response.json()['results'])
+
+    def test_01_genre_any_and_all(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        first, second, third = (genre['slug'] for genre in genres[:3])
+        assert self.filter(client, genre=f'{first},{third}') == sorted(
+            title['name'] for title in titles
+        ), (
+            f'Проверьте, что `{self.url}?genre=a,b` возвращает произведения '
+            'хотя бы одного из жанров.'
+        )
+        assert self.filter(
+            client, genre=f'{first},{second}', genre_match='all'
+        ) == [titles[0]['name']], (
+            f'Проверьте, что `{self.url}?genre=a,b&genre_match=all` '
+            'возвращает произведения всех перечисленных жанров.'
+        )
+        assert self.filter(
+            client, genre=f'{first},{third}', genre_match='all'
+        ) == []
+        assert self.filter(client, genre='unknown') == []
+        assert self.filter(
+            client, genre=f'{first},{third}', category=categories[1]['slug']
+        ) == [titles[1]['name']], (
+            'Проверьте, что фильтр по жанрам сочетается с фильтром '
+            'по категории.'
+        )
+        assert self.filter(
+            client, genre=f'{first},{third}', year=1984
+        ) == [titles[0]['name']]
+
+    def test_02_genre_index_follows_changes(self, client, admin_client):
+        titles, _, genres = create_titles(admin_client)
+        first, third = genres[0]['slug'], genres[2]['slug']
+        assert self.filter(client, genre=third) == [titles[1]['name']]
+
+        title_url = f'{self.url}{titles[0]["id"]}/'
+        admin_client.patch(title_url, data={'genre': [third]})
+        assert self.filter(client, genre=third) == sorted(
+            title['name'] for title in titles
+        ), (
+            'Проверьте, что фильтр по жанрам учитывает изменение жанров '
+            'произведения.'
+        )
+        assert self.filter(client, genre=first) == []
+
+        admin_client.delete(title_url)
+        assert self.filter(client, genre=third) == [titles[1]['name']]
+
+        admin_client.delete(f'/api/v1/genres/{third}/')
+        assert self.filter(client, genre=third) == []
+
+    def test_03_change_in_other_process(self, client, admin_client):
+        titles, _, genres = create_titles(admin_client)
+        slug = genres[2]['slug']
+        assert self.filter(client, genre=slug) == [titles[1]['name']]
+        # Другой процесс снимает жанр: сигналы этого процесса не приходят,
+        # меняются только общие версии кеша и индекса.
+        Title.genre.through.objects.filter(genre__slug=slug).delete()
+        invalidate(('titles',))
+        genre_index.counter.increment()
+        assert self.filter(client, genre=slug) == [], (
+            'Проверьте, что фильтр по жанрам учитывает изменения, '
+            'сделанные другими процессами.'
+        )
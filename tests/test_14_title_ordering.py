@@ -0,0 +1,118 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14TitleOrderingAPI:
+    url = '/api/v1/titles/'
+
+    def create_rated_titles(self, admin_client, user_client,
+                            moderator_client):
+        titles, categories, _ = create_titles(admin_client)
+        for name in ('Чужой', 'Бегущий по лезвию'):
+            response = admin_client.post(self.url, data={
+                'name': name,
+                'year': 1984,
+                'genre': titles[0]['genre'],
+                'category': titles[0]['category'],
+            })
+            titles.append(response.json())
+        scores = {
+            titles[0]['id']: (8, 9),
+            titles[1]['id']: (10,),
+            titles[2]['id']: (8, 8),
+        }
+        clients = (user_client, moderator_client)
+        for title_id, title_scores in scores.items():
+            for client, score in zip(clients, title_scores):
+                create_single_review(client, title_id, 'Отзыв', score)
+        return titles, categories
+
+    def get_names(self, client, url):
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает ответ '
+            'со статусом 200.'
+        )
+        data = response.json()
+        return [title['name'] for title in data['results']], data
+
+    def test_01_ordering(self, client, admin_client, user_client,
+                         moderator_client):
+        self.create_rated_titles(admin_client, user_client, moderator_client)
+        expected = [
+            'Крепкий орешек', 'Терминатор', 'Чужой', 'Бегущий по лезвию'
+        ]
+        names, _ = self.get_names(
+            client, f'{self.url}?ordering=-rating,year,name'
+        )
+        assert names == expected, (
+            f'Проверьте, что `{self.url}?ordering=-rating,year,name` '
+            'упорядочивает произведения по убыванию рейтинга, затем по году '
+            'и названию; произведения без оценок идут последними.'
+        )
+        names, _ = self.get_names(client, f'{self.url}?ordering=name')
+        assert names == sorted(expected)
+
+        results = []
+        url = f'{self.url}?ordering=-rating,year,name&cursor=&limit=1'
+        while url:
+            names, data = self.get_names(client, url)
+            results.extend(names)
+            url = data['next']
+        assert results == expected, (
+            'Проверьте, что постраничный вывод по курсору сохраняет порядок '
+            'из параметра `ordering`.'
+        )
+
+    def test_02_rating_follows_reviews(self, client, admin_client,
+                                       user_client, moderator_client):
+        titles, _ = self.create_rated_titles(
+            admin_client, user_client, moderator_client
+        )
+        reviews_url = f'{self.url}{titles[1]["id"]}/reviews/'
+        review = client.get(reviews_url).json()['results'][0]
+        admin_client.delete(f'{reviews_url}{review["id"]}/')
+        names, _ = self.get_names(
+            client, f'{self.url}?ordering=-rating,name'
+        )
+        assert names == [
+            'Терминатор', 'Чужой', 'Бегущий по лезвию', 'Крепкий орешек'
+        ], (
+            'Проверьте, что произведение без отзывов теряет рейтинг.'
+        )
+
+    @pytest.mark.skipif(
+        connection.vendor != 'sqlite', reason='План запроса SQLite'
+    )
+    def test_03_top_in_category_uses_index(self, client, admin_client,
+                                           user_client, moderator_client):
+        _, categories = self.create_rated_titles(
+            admin_client, user_client, moderator_client
+        )
+        url = (
+            f'{self.url}?ordering=-rating&limit=20'
+            f'&category={categories[0]["slug"]}'
+        )
+        with CaptureQueriesContext(connection) as context:
+            self.get_names(client, url)
+        sql = next(
+            query['sql'] for query in context.captured_queries
+            if 'ORDER BY' in query['sql'] and 'LIMIT' in query['sql']
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        assert 'title_category_rating_idx' in plan, (
+            'Проверьте, что выборка лучших произведений категории читает '
+            f'составной индекс по рейтингу. План запроса: {plan}'
+        )
+        assert 'TEMP B-TREE' not in plan, (
+            'Проверьте, что сортировка по рейтингу выполняется по индексу, '
+            f'без отдельной сортировки. План запроса: {plan}'
+        )
@@ -0,0 +1,119 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15TopTitlesAPI:
+    url = '/api/v1/titles/top/'
+
+    def create_rated_titles(self, admin_client, user_client,
+                            moderator_client):
+        titles, categories, genres = create_titles(admin_client)
+        reviews = [
+            create_single_review(user_client, titles[0]['id'], 'Отзыв', 10),
+            create_single_review(user_client, titles[1]['id'], 'Отзыв', 9),
+            create_single_review(
+                moderator_client, titles[1]['id'], 'Отзыв', 9
+            ),
+        ]
+        reviews = [response.json() for response in reviews]
+        return titles, categories, genres, reviews
+
+    def get_top(self, client, **params):
+        response = client.get(self.url, params)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{self.url}` возвращает ответ '
+            'со статусом 200.'
+        )
+        return [title['name'] for title in response.json()]
+
+    def test_01_weighted_rating(self, client, admin_client, user_client,
+                                moderator_client):
+        titles, categories, genres, _ = self.create_rated_titles(
+            admin_client, user_client, moderator_client
+        )
+        response = client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        data = response.json()
+        assert data['rating'] == 10
+        assert data['weighted_rating'] == pytest.approx(37.5 / 6), (
+            'Проверьте, что взвешенный рейтинг сглаживает среднюю оценку '
+            'к RATING_PRIOR_MEAN с весом RATING_PRIOR_WEIGHT.'
+        )
+        assert self.get_top(client) == [
+            titles[1]['name'], titles[0]['name']
+        ], (
+            f'Проверьте, что `{self.url}` упорядочивает произведения по '
+            'взвешенному рейтингу: две оценки 9 выше одной оценки 10.'
+        )
+        assert self.get_top(client, genre=genres[2]['slug']) == [
+            titles[1]['name']
+        ]
+        assert self.get_top(client, category=categories[0]['slug']) == [
+            titles[0]['name']
+        ]
+        assert self.get_top(client, genre='unknown') == []
+        assert self.get_top(client, limit=1) == [titles[1]['name']]
+
+    def test_02_top_follows_reviews(self, client, admin_client, user_client,
+                                    moderator_client):
+        titles, _, _, reviews = self.create_rated_titles(
+            admin_client, user_client, moderator_client
+        )
+        self.get_top(client)
+        review_url = (
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/{reviews[1]["id"]}/'
+        )
+        user_client.patch(review_url, data={'score': 1})
+        with CaptureQueriesContext(connection) as context:
+            names = self.get_top(client)
+        assert names == [titles[0]['name'], titles[1]['name']], (
+            f'Проверьте, что `{self.url}` учитывает изменение оценок.'
+        )
+        assert not any(
+            'weighted_rating" IS NOT NULL' in query['sql']
+            for query in context.captured_queries
+        ), (
+            'Проверьте, что списки лучших произведений обновляются при '
+            'изменении отзывов, а не рассчитываются заново при запросе.'
+        )
+
+        user_client.delete(review_url)
+        user_client.delete(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+        )
+        assert self.get_top(client) == [titles[1]['name']]
+
+    def test_03_top_bad_request(self, client, admin_client):
+        _, categories, genres = create_titles(admin_client)
+        response = client.get(self.url, {
+            'genre': genres[0]['slug'], 'category': categories[0]['slug']
+        })
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            f'Проверьте, что GET-запрос к `{self.url}` с жанром и категорией '
+            'одновременно возвращает ответ со статусом 400.'
+        )
+        response = client.get(self.url, {'limit': 0})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_04_group_delete(self, client, admin_client, user_client,
+                             moderator_client):
+        titles, categories, genres, _ = self.create_rated_titles(
+            admin_client, user_client, moderator_client
+        )
+        assert self.get_top(client, genre=genres[2]['slug'])
+        assert self.get_top(client, category=categories[0]['slug'])
+        admin_client.delete(f'/api/v1/genres/{genres[2]["slug"]}/')
+        admin_client.delete(f'/api/v1/categories/{categories[0]["slug"]}/')
+        assert self.get_top(client, genre=genres[2]['slug']) == [], (
+            'Проверьте, что удаление жанра сбрасывает списки лучших '
+            'произведений.'
+        )
+        assert self.get_top(client, category=categories[0]['slug']) == [], (
+            'Проверьте, что удаление категории сбрасывает списки лучших '
+            'произведений.'
+        )
@@ -0,0 +1,90 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16RatingDistributionAPI:
+    url = '/api/v1/titles/'
+
+    def get_distribution(self, client, title_id):
+        response = client.get(f'{self.url}{title_id}/')
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert 'rating_distribution' in data, (
+            f'Проверьте, что ответ на GET-запрос к `{self.url}{{title_id}}/` '
+            'содержит поле `rating_distribution`.'
+        )
+        return data['rating_distribution']
+
+    def test_01_distribution_follows_reviews(self, client, admin_client,
+                                             user_client, moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        distribution = self.get_distribution(client, title_id)
+        assert set(distribution['counts'].values()) == {0}
+        assert distribution['median'] is None
+
+        reviews = [
+            create_single_review(client, title_id, 'Отзыв', score).json()
+            for client, score in (
+                (user_client, 4), (moderator_client, 9), (admin_client, 9)
+            )
+        ]
+        distribution = self.get_distribution(client, title_id)
+        assert distribution['counts'] == {
+            '1': 0, '2': 0, '3': 0, '4': 1, '5': 0,
+            '6': 0, '7': 0, '8': 0, '9': 2, '10': 0,
+        }, (
+            'Проверьте, что `rating_distribution` содержит количество '
+            'отзывов для каждой оценки от 1 до 10.'
+        )
+        assert distribution['median'] == 9
+        assert distribution['percentiles']['25'] == 6.5, (
+            'Проверьте, что процентили оценок считаются с линейной '
+            'интерполяцией.'
+        )
+
+        review_url = f'{self.url}{title_id}/reviews/{reviews[1]["id"]}/'
+        moderator_client.patch(review_url, data={'score': 2})
+        admin_client.delete(
+            f'{self.url}{title_id}/reviews/{reviews[2]["id"]}/'
+        )
+        distribution = self.get_distribution(client, title_id)
+        counts = {
+            score: count for score, count in distribution['counts'].items()
+            if count
+        }
+        assert counts == {'2': 1, '4': 1}, (
+            'Проверьте, что гистограмма оценок обновляется при изменении '
+            'и удалении отзывов.'
+        )
+        assert distribution['median'] == 3
+
+    def test_02_bulk_distributions(self, client, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(user_client, titles[1]['id'], 'Отзыв', 7)
+        url = f'{self.url}distributions/'
+        response = client.get(url, {
+            'ids': f'{titles[1]["id"]},999999,{titles[0]["id"]}'
+        })
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}?ids=<id>,<id>` возвращает '
+            'ответ со статусом 200.'
+        )
+        data = response.json()
+        assert [item['id'] for item in data] == [
+            titles[1]['id'], titles[0]['id']
+        ], (
+            f'Проверьте, что `{url}` возвращает распределения оценок '
+            'в порядке запрошенных id и пропускает отсутствующие.'
+        )
+        assert data[0]['rating_distribution']['counts']['7'] == 1
+        assert data[1]['rating_distribution']['median'] is None
+
+        for ids in ('', 'a,b', ','.join(str(pk) for pk in range(1, 102)),
+                    '1,0', '1,-5', f'1,{2 ** 63}', '1,99999999999999999999999'):
+            response = client.get(url, {'ids': ids})
+            assert response.status_code == HTTPStatus.BAD_REQUEST
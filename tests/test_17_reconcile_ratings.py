@@ -0,0 +1,83 @@
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from reviews.management.commands.reconcile_ratings import Command
+from reviews.models import Title
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17ReconcileRatings:
+
+    def reconcile(self, *args):
+        stdout = StringIO()
+        call_command(
+            'reconcile_ratings', '--workers=0', '--chunk-size=1', *args,
+            stdout=stdout,
+        )
+        return stdout.getvalue()
+
+    def test_01_reconcile_fixes_drift(self, admin_client, user_client,
+                                      moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(user_client, titles[0]['id'], 'Отзыв', 8)
+        create_single_review(moderator_client, titles[0]['id'], 'Отзыв', 6)
+        title = Title.objects.get(pk=titles[0]['id'])
+        expected = {
+            field: getattr(title, field) for field in (
+                'score_sum', 'reviews_count', 'rating', 'weighted_rating',
+                'score_6_count', 'score_8_count',
+            )
+        }
+        Title.objects.filter(pk=title.pk).update(
+            score_sum=3, reviews_count=1, rating=3, score_8_count=0
+        )
+
+        output = self.reconcile('--dry-run')
+        assert '2 titles checked' in output
+        assert '1 titles drifted and would be fixed' in output, (
+            'Проверьте, что команда `reconcile_ratings` сообщает '
+            'о произведениях с расхождениями.'
+        )
+        assert 'Total drift: 1 reviews, 11 score points.' in output
+        assert Title.objects.get(pk=title.pk).score_sum == 3, (
+            'Проверьте, что с параметром `--dry-run` команда '
+            '`reconcile_ratings` ничего не сохраняет.'
+        )
+
+        output = self.reconcile()
+        assert '1 titles drifted and fixed' in output
+        title.refresh_from_db()
+        assert {field: getattr(title, field) for field in expected} == (
+            expected
+        ), (
+            'Проверьте, что команда `reconcile_ratings` восстанавливает '
+            'сохранённые рейтинги и гистограмму оценок по отзывам.'
+        )
+        assert '0 titles drifted' in self.reconcile()
+
+    def test_02_reconcile_with_workers(self, monkeypatch, admin_client,
+                                       user_client):
+        # Пул потоков вместо процессов: тестовая база в памяти видна
+        # только этому процессу, а блокировки SQLite общие.
+        monkeypatch.setattr(Command, 'executor_class', ThreadPoolExecutor)
+        titles, _, _ = create_titles(admin_client)
+        for title in titles:
+            create_single_review(user_client, title['id'], 'Отзыв', 8)
+        Title.objects.update(score_sum=3, rating=3)
+
+        stdout = StringIO()
+        call_command(
+            'reconcile_ratings', '--workers=2', '--chunk-size=1',
+            stdout=stdout,
+        )
+        assert '2 titles drifted and fixed' in stdout.getvalue()
+        assert set(Title.objects.values_list('score_sum', 'rating')) == {
+            (8, 8)
+        }, (
+            'Проверьте, что команда `reconcile_ratings` с пулом процессов '
+            'исправляет расхождения.'
+        )
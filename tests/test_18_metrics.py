@@ -0,0 +1,72 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from api.serializers import TitleDetailSerializer
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18MetricsAPI:
+    url = '/api/v1/metrics/'
+
+    def test_01_timing_headers(self, client, admin_client):
+        create_titles(admin_client)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/titles/')
+        assert response.status_code == HTTPStatus.OK
+        assert response['X-DB-Queries'] == str(len(context)), (
+            'Проверьте, что заголовок `X-DB-Queries` содержит количество '
+            'SQL-запросов, выполненных при обработке запроса.'
+        )
+        timing = response['Server-Timing']
+        for metric in ('db;', 'app;', 'serialize;', 'render;', 'total;'):
+            assert metric in timing, (
+                'Проверьте, что заголовок `Server-Timing` содержит время '
+                'работы базы, представления, сериализации, отрисовки '
+                'и общее время.'
+            )
+
+    def test_02_route_stats(self, client, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        client.get('/api/v1/titles/')
+        response = client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert type(response.data.serializer) is TitleDetailSerializer, (
+            'Проверьте, что учёт времени сериализации не подменяет класс '
+            'сериализатора.'
+        )
+        client.get(f'/api/v1/titles/{titles[1]["id"]}/')
+
+        assert client.get(self.url).status_code == HTTPStatus.UNAUTHORIZED
+        response = user_client.get(self.url)
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            f'Проверьте, что `{self.url}` доступен только администратору.'
+        )
+        response = admin_client.get(self.url)
+        assert response.status_code == HTTPStatus.OK
+        stats = {item['route']: item for item in response.json()}
+        detail = stats.get('GET title-detail')
+        assert detail is not None and detail['count'] == 2, (
+            f'Проверьте, что `{self.url}` собирает статистику по маршрутам.'
+        )
+        for key in ('p50_ms', 'p95_ms', 'p99_ms', 'mean_queries',
+                    'mean_db_ms', 'mean_serialize_ms'):
+            assert key in detail
+        assert detail['mean_serialize_ms'] > 0, (
+            'Проверьте, что статистика маршрутов учитывает время '
+            'сериализации ответов.'
+        )
+        assert detail['p50_ms'] <= detail['p95_ms'] <= detail['p99_ms']
+        assert stats['POST title-list']['count'] == 2
+
+    def test_03_disabled(self, settings):
+        settings.API_METRICS_ENABLED = False
+        response = Client().get('/api/v1/titles/')
+        assert response.status_code == HTTPStatus.OK
+        assert 'X-DB-Queries' not in response, (
+            'Проверьте, что при API_METRICS_ENABLED = False промежуточный '
+            'слой учёта запросов не подключается.'
+        )
@@ -0,0 +1,59 @@
+import pytest
+
+from api.nplusone import NPlusOneError, QueryFingerprints, fingerprint
+from api.views import TitleViewSet
+from reviews.models import Title
+from tests.utils import create_titles
+
+
+def create_many_titles(admin_client, count=6):
+    titles, _, _ = create_titles(admin_client)
+    for idx in range(count - len(titles)):
+        admin_client.post('/api/v1/titles/', data={
+            'name': f'Произведение {idx}',
+            'year': 2000,
+            'genre': titles[0]['genre'],
+            'category': titles[0]['category'],
+        })
+
+
+def test_01_fingerprint():
+    assert fingerprint(
+        'SELECT * FROM "t" WHERE "id" = 1 AND "name" = \'a\'\'b\''
+    ) == fingerprint(
+        'SELECT  *  FROM "t" WHERE "id" = 25 AND "name" = \'c\''
+    ), (
+        'Проверьте, что отпечаток запроса не зависит от значений параметров.'
+    )
+    assert fingerprint(
+        'SELECT * FROM "t" WHERE "id" IN (1, 2, 3)'
+    ) == fingerprint('SELECT * FROM "t" WHERE "id" IN (%s)')
+    assert fingerprint('SELECT * FROM "t1"') != fingerprint(
+        'SELECT * FROM "t2"'
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19NPlusOne:
+
+    def test_01_detector(self, admin_client):
+        create_many_titles(admin_client)
+        with QueryFingerprints(threshold=5) as queries:
+            for title in Title.objects.all():
+                title.category.name
+        with pytest.raises(NPlusOneError):
+            queries.check('titles', raise_error=True)
+
+        with QueryFingerprints(threshold=5) as queries:
+            for title in Title.objects.select_related('category'):
+                title.category.name
+        queries.check('titles', raise_error=True)
+
+    def test_02_api_n_plus_one_fails(self, client, admin_client,
+                                     monkeypatch):
+        create_many_titles(admin_client)
+        client.get('/api/v1/titles/')
+
+        monkeypatch.setattr(TitleViewSet, 'queryset', Title.objects.all())
+        with pytest.raises(NPlusOneError, match='GET /api/v1/titles/'):
+            client.get('/api/v1/titles/?limit=6')
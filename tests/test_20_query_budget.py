@@ -0,0 +1,193 @@
+from http import HTTPStatus
+from time import perf_counter
+
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, resolve
+
+from api import urls as api_urls
+
+from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.ratings import recalculate_title_ratings
+from users.models import User
+
+TITLES = 30
+GENRES = 6
+CATEGORIES = 3
+AUTHORS = 12
+# Время ответа с запасом на медленные машины: ловит не шум,
+# а деградацию на порядки, например полный просмотр таблиц.
+MAX_SECONDS = 0.5
+
+# (имя, клиент, метод, шаблон URL, данные, бюджет SQL-запросов).
+# Клиент admin тратит один запрос на загрузку пользователя по токену,
+# первый фильтр по жанрам — два на построение индекса жанров,
+# каждое изменение каталога — запись в журнал изменений.
+ENDPOINTS = (
+    ('titles-list', 'anon', 'get', '/api/v1/titles/', None, 3),
+    ('titles-list-cursor', 'anon', 'get',
+     '/api/v1/titles/?cursor=&ordering=-rating', None, 2),
+    ('titles-list-filtered', 'anon', 'get',
+     '/api/v1/titles/?genre={genre},{genre2}&category={category}', None, 5),
+    ('titles-search', 'anon', 'get', '/api/v1/titles/?search=title', None, 3),
+    ('titles-detail', 'anon', 'get', '/api/v1/titles/{title}/', None, 2),
+    ('titles-top', 'anon', 'get', '/api/v1/titles/top/', None, 3),
+    ('titles-top-genre', 'anon', 'get',
+     '/api/v1/titles/top/?genre={genre}', None, 3),
+    ('titles-distributions', 'anon', 'get',
+     '/api/v1/titles/distributions/?ids={title},{title2}', None, 1),
+    ('genres-list', 'anon', 'get', '/api/v1/genres/', None, 2),
+    ('categories-list', 'anon', 'get', '/api/v1/categories/', None, 2),
+    ('reviews-list', 'anon', 'get',
+     '/api/v1/titles/{title}/reviews/', None, 3),
+    ('reviews-detail', 'anon', 'get',
+     '/api/v1/titles/{title}/reviews/{review}/', None, 2),
+    ('comments-list', 'anon', 'get',
+     '/api/v1/titles/{title}/reviews/{review}/comments/', None, 3),
+    ('comments-list-expand', 'anon', 'get',
+     '/api/v1/titles/{title}/reviews/{review}/comments/?expand=review',
+     None, 3),
+    ('comments-detail', 'anon', 'get',
+     '/api/v1/titles/{title}/reviews/{review}/comments/{comment}/', None, 2),
+    ('autocomplete', 'anon', 'get', '/api/v1/autocomplete/?q=ti', None, 3),
+    ('users-list', 'admin', 'get', '/api/v1/users/', None, 3),
+    ('users-detail', 'admin', 'get', '/api/v1/users/{username}/', None, 2),
+    ('users-me', 'admin', 'get', '/api/v1/users/me/', None, 1),
+    ('metrics', 'admin', 'get', '/api/v1/metrics/', None, 1),
+    ('export', 'anon', 'get', '/api/v1/export/titles/', None, 1),
+    ('changes', 'anon', 'get', '/api/v1/changes/', None, 1),
+    ('reviews-create', 'admin', 'post', '/api/v1/titles/{title}/reviews/',
+     {'text': 'Новый отзыв', 'score': 7}, 7),
+    ('comments-create', 'admin', 'post',
+     '/api/v1/titles/{title}/reviews/{review}/comments/',
+     {'text': 'Новый комментарий'}, 4),
+    ('auth-signup', 'anon', 'post', '/api/v1/auth/signup/',
+     {'username': 'newcomer', 'email': 'newcomer@yamdb.fake'}, 4),
+    ('auth-token', 'anon', 'post', '/api/v1/auth/token/',
+     {'username': 'author0', 'confirmation_code': '{code}'}, 1),
+)
+# Маршруты без GET и POST, которые нечего измерять.
+UNMEASURED_ROUTES = {'api-root', 'genre-detail', 'category-detail'}
+
+
+def get_route_names(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from get_route_names(pattern.url_patterns)
+        elif pattern.name:
+            yield pattern.name
+
+
+@pytest.fixture
+def dataset(admin):
+    """Каталог с несколькими отзывами и комментариями на произведение."""
+    Genre.objects.bulk_create(
+        Genre(name=f'Genre {idx}', slug=f'genre-{idx}')
+        for idx in range(GENRES)
+    )
+    Category.objects.bulk_create(
+        Category(name=f'Category {idx}', slug=f'category-{idx}')
+        for idx in range(CATEGORIES)
+    )
+    User.objects.bulk_create(
+        User(username=f'author{idx}', email=f'author{idx}@yamdb.fake')
+        for idx in range(AUTHORS)
+    )
+    genres = list(Genre.objects.order_by('pk'))
+    categories = list(Category.objects.order_by('pk'))
+    authors = list(User.objects.filter(username__startswith='author'))
+    Title.objects.bulk_create(
+        Title(
+            name=f'Title {idx}', year=1950 + idx,
+            description=f'Description of title {idx}',
+            category=categories[idx % CATEGORIES],
+        )
+        for idx in range(TITLES)
+    )
+    titles = list(Title.objects.order_by('pk'))
+    Title.genre.through.objects.bulk_create(
+        Title.genre.through(title=title, genre=genres[(idx + shift) % GENRES])
+        for idx, title in enumerate(titles) for shift in (0, 1)
+    )
+    Review.objects.bulk_create(
+        Review(
+            title=title, author=author, text=f'Review of {title.name}',
+            score=(idx + number) % 10 + 1,
+        )
+        for idx, title in enumerate(titles)
+        for number, author in enumerate(authors[:idx % AUTHORS + 1])
+    )
+    title = titles[-1]
+    reviews = list(Review.objects.filter(title=title).order_by('pk'))
+    Comment.objects.bulk_create(
+        Comment(review=review, author=author, text='Comment')
+        for review in reviews for author in authors[:3]
+    )
+    recalculate_title_ratings(title.pk for title in titles)
+    review = reviews[0]
+    return {
+        'title': title.pk,
+        'title2': titles[-2].pk,
+        'review': review.pk,
+        'comment': review.comments.first().pk,
+        'genre': genres[0].slug,
+        'genre2': genres[1].slug,
+        'category': categories[0].slug,
+        'username': authors[0].username,
+        'code': default_token_generator.make_token(authors[0]),
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize(
+    'client_kind, method, url, data, budget',
+    [endpoint[1:] for endpoint in ENDPOINTS],
+    ids=[endpoint[0] for endpoint in ENDPOINTS],
+)
+def test_query_budget(client, admin_client, dataset, client_kind, method,
+                      url, data, budget):
+    url = url.format(**dataset)
+    if data is not None:
+        data = {key: value.format(**dataset) if isinstance(value, str)
+                else value for key, value in data.items()}
+    api_client = admin_client if client_kind == 'admin' else client
+    request = getattr(api_client, method)
+    with CaptureQueriesContext(connection) as context:
+        started = perf_counter()
+        response = request(url, data=data)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        elapsed = perf_counter() - started
+    assert response.status_code in (HTTPStatus.OK, HTTPStatus.CREATED), (
+        f'Проверьте, что запрос {method.upper()} к `{url}` выполняется '
+        f'успешно: {response.status_code} {response.content[:200]}'
+    )
+    queries = '\n'.join(query['sql'] for query in context.captured_queries)
+    assert len(context) <= budget, (
+        f'{method.upper()} `{url}` выполнил {len(context)} SQL-запросов '
+        f'при бюджете {budget}:\n{queries}'
+    )
+    assert elapsed <= MAX_SECONDS, (
+        f'{method.upper()} `{url}` обрабатывался {elapsed:.3f} с '
+        f'при бюджете {MAX_SECONDS} с.'
+    )
+
+
+def test_every_route_has_budget():
+    placeholders = {
+        'title': 1, 'title2': 2, 'review': 1, 'comment': 1, 'genre': 'g',
+        'genre2': 'g', 'category': 'c', 'username': 'u', 'code': '',
+    }
+    covered = {
+        resolve(url.format(**placeholders).split('?')[0]).url_name
+        for _, _, _, url, _, _ in ENDPOINTS
+    }
+    missing = (
+        set(get_route_names(api_urls.urlpatterns))
+        - UNMEASURED_ROUTES - covered
+    )
+    assert not missing, (
+        f'Добавьте в ENDPOINTS бюджет запросов для маршрутов: {missing}.'
+    )
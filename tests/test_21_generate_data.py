@@ -0,0 +1,117 @@
+import random
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+
+from reviews.management.commands.generate_data import distribute
+from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.ratings import recalculate_title_ratings
+from users.models import User
+
+OPTIONS = (
+    '--users=15', '--titles=20', '--genres=4', '--categories=3',
+    '--reviews=150', '--comments=60', '--batch-size=7',
+)
+
+
+def generate(*args):
+    stdout = StringIO()
+    call_command('generate_data', *OPTIONS, *args, stdout=stdout)
+    return stdout.getvalue()
+
+
+def snapshot():
+    return (
+        list(Review.objects.order_by('pk').values_list(
+            'title_id', 'author_id', 'score'
+        )),
+        list(Comment.objects.order_by('pk').values_list(
+            'review_id', 'author_id'
+        )),
+        list(Title.objects.order_by('pk').values_list(
+            'category_id', 'year', 'rating', 'genre'
+        )),
+    )
+
+
+def test_01_distribute():
+    counts = distribute(2000, 100, 1.1, random.Random(0), limit=150)
+    assert sum(counts) == 2000 and max(counts) <= 150, (
+        'Проверьте, что распределение сохраняет общее количество '
+        'и не превышает ограничение на объект.'
+    )
+    assert max(counts) > 5 * sorted(counts)[len(counts) // 2], (
+        'Проверьте, что количество распределяется по закону Ципфа.'
+    )
+    assert sum(distribute(1000, 10, 1.1, random.Random(0), limit=30)) == 300
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21GenerateData:
+
+    def test_01_generate(self):
+        output = generate('--seed=3')
+        assert 'reviews_review: 150 rows' in output, (
+            'Проверьте, что команда `generate_data` сообщает скорость '
+            'вставки по таблицам.'
+        )
+        assert User.objects.count() == 15
+        assert Title.objects.count() == 20
+        assert Genre.objects.count() == 4
+        assert Review.objects.count() == 150
+        assert Comment.objects.count() == 60
+        assert not Review.objects.values('title', 'author').annotate(
+            total=Count('pk')
+        ).filter(total__gt=1).exists(), (
+            'Проверьте, что команда `generate_data` не создаёт двух '
+            'отзывов одного автора на одно произведение.'
+        )
+        assert not Title.objects.filter(genre=None).exists()
+        assert recalculate_title_ratings(
+            Title.objects.values_list('pk', flat=True), save=False
+        ) == {}, (
+            'Проверьте, что команда `generate_data` сохраняет рейтинги '
+            'и гистограммы оценок, совпадающие с отзывами.'
+        )
+
+    def test_02_seed(self):
+        generate('--seed=5')
+        first = snapshot()
+        for model in (Comment, Review, Title, Genre, Category, User):
+            model.objects.all().delete()
+        generate('--seed=5')
+        assert snapshot() == first, (
+            'Проверьте, что команда `generate_data` с одним и тем же '
+            '`--seed` создаёт одинаковые данные.'
+        )
+
+    def test_03_appends(self):
+        generate('--seed=1')
+        generate('--seed=2')
+        assert Review.objects.count() == 300
+        assert User.objects.count() == 30
+        last = Title.objects.order_by('pk').last().pk
+        title = Title.objects.create(name='Новое', year=2000)
+        assert title.pk > last, (
+            'Проверьте, что после `generate_data` новые объекты получают '
+            'свободные первичные ключи.'
+        )
+
+    def test_04_no_explicit_null_ids(self):
+        with CaptureQueriesContext(connection) as context:
+            generate('--seed=1')
+        inserts = [
+            query['sql'] for query in context.captured_queries
+            if 'INSERT INTO' in query['sql']
+        ]
+        assert inserts
+        for sql in inserts:
+            if '"reviews_title_genre"' in sql or '"reviews_comment"' in sql:
+                assert '"id"' not in sql, (
+                    'Проверьте, что `generate_data` не передаёт NULL '
+                    'в автоинкрементный первичный ключ.'
+                )
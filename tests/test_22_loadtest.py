@@ -0,0 +1,75 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from reviews.management.commands.loadtest import get_change, summarize
+from reviews.models import Comment
+from tests.utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22LoadTest:
+
+    def loadtest(self, *args):
+        stdout = StringIO()
+        call_command(
+            'loadtest', '--requests=40', '--warmup=5', *args,
+            stdout=stdout,
+        )
+        return stdout.getvalue()
+
+    def test_01_loadtest(self, admin_client, admin, user_client, user,
+                         tmp_path):
+        create_reviews(admin_client, {admin: admin_client, user: user_client})
+        output_file = tmp_path / 'run.json'
+        comments = Comment.objects.count()
+
+        # Тестовая база SQLite в памяти не ждёт блокировок таблиц,
+        # поэтому запросы на запись выполняются в одном потоке.
+        output = self.loadtest(
+            '--seed=1', '--threads=1', f'--output={output_file}'
+        )
+        assert '40 requests in' in output
+        result = json.loads(output_file.read_text())
+        assert result['total']['requests'] == 40
+        assert result['total']['errors'] == 0, (
+            'Проверьте, что запросы нагрузочного прогона выполняются '
+            'успешно.'
+        )
+        assert sum(
+            stats['requests'] for stats in result['endpoints'].values()
+        ) == 40
+        for stats in result['endpoints'].values():
+            for key in ('rps', 'p50_ms', 'p95_ms', 'p99_ms', 'mean_queries'):
+                assert stats[key] is not None, (
+                    'Проверьте, что команда `loadtest` сообщает пропускную '
+                    'способность, процентили задержки и число SQL-запросов '
+                    'по каждому виду запросов.'
+                )
+        assert Comment.objects.count() > comments
+
+        output = self.loadtest(
+            '--mix=titles-list=1,titles-detail=1', '--threads=2',
+            f'--baseline={output_file}',
+        )
+        assert 'req/s' in output and 'p95' in output
+        assert 'comments-create' not in output
+
+    def test_02_invalid_mix(self, admin_client):
+        with pytest.raises(CommandError):
+            self.loadtest('--mix=unknown=1')
+        with pytest.raises(CommandError, match='generate_data'):
+            self.loadtest()
+
+
+def test_summarize_and_compare_edge_cases():
+    stats = summarize([], 0)
+    assert stats['requests'] == 0 and stats['rps'] == 0, (
+        'Проверьте, что сводка по пустой выборке не падает и содержит '
+        'нулевые показатели.'
+    )
+    assert stats['p95_ms'] == 0
+    assert get_change(10, 0) == 'n/a'
+    assert get_change(15, 10) == '+50.0%'
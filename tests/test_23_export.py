@@ -0,0 +1,137 @@
+import csv
+import gzip
+import json
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Category, Comment, Genre, Review, Title
+from tests.utils import create_comments
+from users.models import User
+
+
+def read_lines(response):
+    return b''.join(response.streaming_content).decode().splitlines()
+
+
+def snapshot():
+    return {
+        model.__name__: list(
+            model.objects.order_by('pk').values_list(*fields)
+        )
+        for model, fields in (
+            (User, ('id', 'username', 'email', 'role')),
+            (Category, ('id', 'name', 'slug')),
+            (Genre, ('id', 'name', 'slug')),
+            (Title, ('id', 'name', 'year', 'category', 'description',
+                     'reviews_count', 'rating', 'weighted_rating',
+                     'score_5_count')),
+            (Title.genre.through, ('id', 'title', 'genre')),
+            (Review, ('id', 'title', 'author', 'text', 'score', 'pub_date')),
+            (Comment, ('id', 'review', 'author', 'text', 'pub_date')),
+        )
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23ExportAPI:
+    url = '/api/v1/export/{sheet}/'
+
+    def create_data(self, admin_client, admin, user_client, user):
+        return create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+
+    def test_01_ndjson(self, client, admin_client, admin, user_client, user):
+        self.create_data(admin_client, admin, user_client, user)
+        response = client.get(self.url.format(sheet='titles'))
+        assert response.status_code == HTTPStatus.OK
+        assert response.streaming, (
+            'Проверьте, что выгрузка отдаётся через StreamingHttpResponse.'
+        )
+        assert response['Content-Type'] == 'application/x-ndjson'
+        rows = [json.loads(line) for line in read_lines(response)]
+        assert [row['id'] for row in rows] == list(
+            Title.objects.order_by('pk').values_list('pk', flat=True)
+        )
+        rated = next(row for row in rows if row['reviews_count'])
+        assert rated['rating'] == 5 and rated['reviews_count'] == 2, (
+            'Проверьте, что выгрузка произведений содержит их рейтинги.'
+        )
+
+        response = client.get(self.url.format(sheet='comments'))
+        assert len(read_lines(response)) == Comment.objects.count()
+
+    def test_02_csv_gzip(self, client, admin_client, admin, user_client,
+                         user):
+        self.create_data(admin_client, admin, user_client, user)
+        url = self.url.format(sheet='review')
+        response = client.get(url, {'output': 'csv'})
+        assert response['Content-Type'].startswith('text/csv')
+        plain = b''.join(response.streaming_content)
+        rows = list(csv.DictReader(StringIO(plain.decode())))
+        assert len(rows) == Review.objects.count()
+        assert set(rows[0]) == {
+            'id', 'title_id', 'text', 'author', 'score', 'pub_date',
+        }
+
+        response = client.get(
+            url, {'output': 'csv'}, HTTP_ACCEPT_ENCODING='gzip, deflate'
+        )
+        assert response['Content-Encoding'] == 'gzip', (
+            'Проверьте, что выгрузка сжимается на лету, если клиент '
+            'принимает gzip.'
+        )
+        assert 'Accept-Encoding' in response['Vary']
+        assert gzip.decompress(b''.join(response.streaming_content)) == plain
+
+    def test_03_errors_and_permissions(self, client, admin_client,
+                                       user_client):
+        response = client.get(self.url.format(sheet='unknown'))
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        response = client.get(self.url.format(sheet='titles'),
+                              {'output': 'xml'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        url = self.url.format(sheet='users')
+        assert client.get(url).status_code in (
+            HTTPStatus.UNAUTHORIZED, HTTPStatus.FORBIDDEN
+        )
+        assert user_client.get(url).status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что выгрузка пользователей доступна только '
+            'администратору.'
+        )
+        assert admin_client.get(url).status_code == HTTPStatus.OK
+
+    def test_04_csv_round_trip(self, admin_client, admin, user_client, user,
+                               tmp_path):
+        self.create_data(admin_client, admin, user_client, user)
+        Title.objects.filter(description=None).update(description='Текст')
+        expected = snapshot()
+        call_command(
+            'export_data', '--format=csv', f'--path={tmp_path}',
+            stdout=StringIO(),
+        )
+        for model in (Comment, Review, Title, Genre, Category, User):
+            model.objects.all().delete()
+        call_command('csv_fill', f'--path={tmp_path}', stdout=StringIO())
+        assert snapshot() == expected, (
+            'Проверьте, что выгрузка в csv загружается командой csv_fill '
+            'без потерь.'
+        )
+
+    def test_05_command_gzip(self, admin_client, admin, user_client, user,
+                             tmp_path):
+        self.create_data(admin_client, admin, user_client, user)
+        call_command(
+            'export_data', 'titles', 'comments', '--gzip',
+            f'--path={tmp_path}', stdout=StringIO(),
+        )
+        assert sorted(path.name for path in tmp_path.iterdir()) == [
+            'comments.ndjson.gz', 'titles.ndjson.gz',
+        ]
+        lines = gzip.decompress(
+            (tmp_path / 'comments.ndjson.gz').read_bytes()
+        ).decode().splitlines()
+        assert len(lines) == Comment.objects.count()
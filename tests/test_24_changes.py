@@ -0,0 +1,179 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import ChangeLog
+from tests.utils import (create_single_comment, create_single_review,
+                         create_titles)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24ChangesAPI:
+    url = '/api/v1/changes/'
+
+    def events(self, results):
+        return [
+            (item['object_type'], item['object_id'], item['action'])
+            for item in results
+        ]
+
+    def test_01_feed(self, client, admin_client, user_client):
+        titles, categories, genres = create_titles(admin_client)
+        response = client.get(self.url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что `{self.url}` доступен без токена.'
+        )
+        data = response.json()
+        events = self.events(data['results'])
+        assert ('title', titles[0]['id'], 'create') in events, (
+            'Проверьте, что создание произведения попадает в журнал '
+            'изменений.'
+        )
+        assert ('genre', ChangeLog.objects.filter(
+            object_type='genre'
+        ).first().object_id, 'create') in events
+        assert ('category', ChangeLog.objects.filter(
+            object_type='category'
+        ).first().object_id, 'create') in events
+        ids = [item['id'] for item in data['results']]
+        assert ids == sorted(ids)
+        assert data['has_more'] is False
+        assert data['next'], (
+            'Проверьте, что лента изменений возвращает курсор `next` '
+            'и на последней странице.'
+        )
+
+        response = client.get(data['next'])
+        assert response.json()['results'] == [], (
+            'Проверьте, что по курсору `since` возвращаются только '
+            'изменения после уже полученных.'
+        )
+        title_id = titles[0]['id']
+        review = create_single_review(user_client, title_id, 'Отзыв', 7)
+        review_id = review.json()['id']
+        admin_client.patch(
+            f'/api/v1/titles/{title_id}/', data={'name': 'Новое имя'}
+        )
+        data = client.get(data['next']).json()
+        events = self.events(data['results'])
+        assert ('review', review_id, 'create') in events
+        assert events.count(('title', title_id, 'update')) >= 2, (
+            'Проверьте, что изменение произведения и его рейтинга '
+            'попадает в журнал изменений.'
+        )
+
+        admin_client.delete(f'/api/v1/titles/{title_id}/')
+        data = client.get(data['next']).json()
+        events = self.events(data['results'])
+        assert ('title', title_id, 'delete') in events
+        assert ('review', review_id, 'delete') in events, (
+            'Проверьте, что каскадное удаление отзывов попадает в журнал '
+            'изменений.'
+        )
+
+    def test_02_paging_and_type(self, client, admin_client):
+        create_titles(admin_client)
+        total = ChangeLog.objects.count()
+        seen = []
+        url = f'{self.url}?limit=2'
+        while True:
+            data = client.get(url).json()
+            seen += [item['id'] for item in data['results']]
+            url = data['next']
+            if not data['has_more']:
+                break
+        assert len(seen) == total and len(set(seen)) == total, (
+            'Проверьте, что постраничный обход ленты изменений возвращает '
+            'каждую запись ровно один раз.'
+        )
+
+        data = client.get(self.url, {'type': 'genre,category'}).json()
+        assert {item['object_type'] for item in data['results']} == {
+            'genre', 'category',
+        }
+
+        response = client.get(self.url, {'since': 'broken'})
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_03_read_only(self, admin_client):
+        response = admin_client.post(self.url, data={})
+        assert response.status_code == HTTPStatus.METHOD_NOT_ALLOWED
+
+    def test_04_category_and_genre_delete(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        since = ChangeLog.objects.order_by('pk').last().pk
+        admin_client.delete(f'/api/v1/categories/{categories[0]["slug"]}/')
+        admin_client.delete(f'/api/v1/genres/{genres[2]["slug"]}/')
+        events = self.events(
+            ChangeLog.objects.filter(pk__gt=since).values(
+                'object_type', 'object_id', 'action'
+            )
+        )
+        assert ('title', titles[0]['id'], 'update') in events, (
+            'Проверьте, что удаление категории отмечает её произведения '
+            'изменёнными в журнале изменений.'
+        )
+        assert ('title', titles[1]['id'], 'update') in events, (
+            'Проверьте, что удаление жанра отмечает его произведения '
+            'изменёнными в журнале изменений.'
+        )
+
+    def test_05_cascade_delete_in_bulk(self, admin_client, admin,
+                                       user_client, user, moderator_client,
+                                       moderator):
+        clients = {
+            admin: admin_client, user: user_client,
+            moderator: moderator_client,
+        }
+        titles, _, _ = create_titles(admin_client)
+        queries = []
+        for title, authors in zip(titles, ([admin], list(clients))):
+            for author in authors:
+                review = create_single_review(
+                    clients[author], title['id'], 'Отзыв', 5
+                ).json()
+                for client in clients.values():
+                    create_single_comment(
+                        client, title['id'], review['id'], 'Комментарий'
+                    )
+            with CaptureQueriesContext(connection) as context:
+                admin_client.delete(f'/api/v1/titles/{title["id"]}/')
+            queries.append(len(context))
+        assert queries[0] == queries[1], (
+            'Проверьте, что число запросов при удалении произведения '
+            'не растёт с числом его отзывов и комментариев.'
+        )
+        assert ChangeLog.objects.filter(
+            object_type='review', action='delete'
+        ).count() == 4
+        assert ChangeLog.objects.filter(
+            object_type='comment', action='delete'
+        ).count() == 12, (
+            'Проверьте, что каскадное удаление комментариев попадает '
+            'в журнал изменений.'
+        )
+
+    def test_06_author_delete(self, admin_client, admin, user_client, user):
+        titles, _, _ = create_titles(admin_client)
+        own = create_single_review(
+            user_client, titles[0]['id'], 'Отзыв', 5
+        ).json()
+        other = create_single_review(
+            admin_client, titles[0]['id'], 'Отзыв', 5
+        ).json()
+        create_single_comment(admin_client, titles[0]['id'], own['id'], 'К')
+        comment = create_single_comment(
+            user_client, titles[0]['id'], other['id'], 'К'
+        ).json()
+        admin_client.delete(f'/api/v1/users/{user.username}/')
+        events = self.events(ChangeLog.objects.filter(action='delete').values(
+            'object_type', 'object_id', 'action'
+        ))
+        assert ('review', own['id'], 'delete') in events
+        assert ('comment', comment['id'], 'delete') in events
+        assert len(events) == 3, (
+            'Проверьте, что удаление пользователя записывает в журнал '
+            'удаление его отзывов и комментариев.'
+        )
@@ -0,0 +1,63 @@
+from io import StringIO
+from smtplib import SMTPServerDisconnected
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+
+from users.models import OutgoingEmail
+
+
+class FlakyBackend(EmailBackend):
+    """
+    Первая отправка разрывает соединение: без повторного открытия
+    все следующие письма тоже не уходят.
+    """
+    opened = 0
+    failed = False
+
+    def open(self):
+        FlakyBackend.opened += 1
+        self.alive = True
+        return True
+
+    def close(self):
+        self.alive = False
+
+    def send_messages(self, messages):
+        if not FlakyBackend.failed:
+            FlakyBackend.failed = True
+            self.alive = False
+            raise SMTPServerDisconnected('Connection unexpectedly closed')
+        if not self.alive:
+            raise SMTPServerDisconnected('please run connect() first')
+        return super().send_messages(messages)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25SendEmails:
+
+    def test_01_reconnect_after_error(self, settings):
+        settings.EMAIL_BACKEND = 'tests.test_25_send_emails.FlakyBackend'
+        FlakyBackend.opened = 0
+        FlakyBackend.failed = False
+        OutgoingEmail.objects.bulk_create(
+            OutgoingEmail(
+                subject='Код', body='123', from_email='from@yamdb.fake',
+                to=f'user{idx}@yamdb.fake',
+            )
+            for idx in range(3)
+        )
+        outbox_before_count = len(mail.outbox)
+        call_command('send_emails', stdout=StringIO(), stderr=StringIO())
+        assert len(mail.outbox) == outbox_before_count + 2, (
+            'Проверьте, что команда `send_emails` после ошибки отправки '
+            'открывает соединение заново и отправляет остальные письма.'
+        )
+        failed = OutgoingEmail.objects.get(sent__isnull=True)
+        assert failed.attempts == 1 and failed.last_error, (
+            'Проверьте, что неотправленное письмо остаётся в очереди '
+            'с текстом ошибки.'
+        )
+        assert FlakyBackend.opened == 2